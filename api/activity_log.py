@@ -0,0 +1,51 @@
+"""
+The activity feed: each user's most recent activities, kept in the cache.
+
+The feed holds the newest ACTIVITY_FEED_SIZE rows per user, in the same
+.values() shape StudyActivityReadSerializer reads. Any write to a user's
+activities drops it once the transaction commits and the next read refills
+it with one indexed query; a read-modify-write of the cached list would lose
+one of two activities committed at the same moment. Entries also expire
+after ACTIVITY_FEED_TTL seconds, in case a read that raced a write cached
+the old rows. The recent-activity endpoint and the dashboard read from it,
+so the size of the activity table never shows up on those paths.
+
+Older activity stays in the table, bucketed by month (StudyActivity.month);
+`manage.py compact_activities` folds months past the retention window into
+StudyActivityRollup rows.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import StudyActivity
+from .read_serializers import StudyActivityReadSerializer
+
+
+def feed_size():
+    return getattr(settings, 'ACTIVITY_FEED_SIZE', 20)
+
+
+def feed_timeout():
+    return getattr(settings, 'ACTIVITY_FEED_TTL', 300)
+
+
+def activity_feed_key(user_id):
+    return f'activity-feed:{user_id}'
+
+
+def feed_queryset(user_id):
+    return StudyActivityReadSerializer.values(StudyActivity.objects.filter(user_id=user_id)[:feed_size()])
+
+
+def get_activity_feed(user_id, limit=None):
+    """The user's newest activities as rows, newest first"""
+    key = activity_feed_key(user_id)
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(feed_queryset(user_id))
+        cache.set(key, rows, feed_timeout())
+    return rows[:limit]
+
+
+def invalidate_activity_feed(user_id):
+    cache.delete(activity_feed_key(user_id))
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
-    ScheduleItem, Quiz, QuizQuestion, QuizAttempt,
-    Assignment, WeeklyGoal, StudyActivity, SubjectPerformance, Exam
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt,
+    Assignment, WeeklyGoal, StudyActivity, StudyActivityRollup, SubjectPerformance, Exam,
+    QuestionStats, QuizScoreBucket, UserQuizStats, Document, StudyTimeDaily, StudyTimeRollup
 )
 
 
@@ -12,6 +13,24 @@ class ScheduleItemAdmin(admin.ModelAdmin):
     search_fields = ['subject']
 
 
+@admin.register(ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'weekday', 'start_time', 'end_time', 'starts_on', 'ends_on']
+    list_filter = ['weekday']
+    search_fields = ['subject']
+
+
+class QuizListFilter(admin.RelatedFieldListFilter):
+    """Quiz filter whose choices load their users in the same query (Quiz.__str__ shows the user)"""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        return [
+            (quiz.pk, str(quiz))
+            for quiz in Quiz.objects.select_related('user').order_by(*ordering)
+        ]
+
+
 class QuizQuestionInline(admin.TabularInline):
     model = QuizQuestion
     extra = 1
@@ -28,13 +47,15 @@ class QuizAdmin(admin.ModelAdmin):
 @admin.register(QuizQuestion)
 class QuizQuestionAdmin(admin.ModelAdmin):
     list_display = ['quiz', 'question_text', 'correct_answer', 'order']
-    list_filter = ['quiz']
+    list_filter = [('quiz', QuizListFilter)]
+    list_select_related = ['quiz__user']
 
 
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ['quiz', 'score', 'total_questions', 'percentage', 'completed_at']
-    list_filter = ['quiz', 'completed_at']
+    list_filter = [('quiz', QuizListFilter), 'completed_at']
+    list_select_related = ['quiz__user']
 
 
 @admin.register(Assignment)
@@ -56,6 +77,13 @@ class StudyActivityAdmin(admin.ModelAdmin):
     list_filter = ['activity_time']
 
 
+@admin.register(StudyActivityRollup)
+class StudyActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'activities', 'first_activity', 'last_activity']
+    list_filter = ['month']
+    list_select_related = ['user']
+
+
 @admin.register(SubjectPerformance)
 class SubjectPerformanceAdmin(admin.ModelAdmin):
     list_display = ['subject', 'grade', 'percentage']
@@ -66,3 +94,42 @@ class SubjectPerformanceAdmin(admin.ModelAdmin):
 class ExamAdmin(admin.ModelAdmin):
     list_display = ['title', 'subject', 'exam_date', 'days_until']
     list_filter = ['subject', 'exam_date']
+
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    list_display = ['question', 'attempts', 'correct', 'correct_rate']
+    list_select_related = ['question']
+
+
+@admin.register(QuizScoreBucket)
+class QuizScoreBucketAdmin(admin.ModelAdmin):
+    list_display = ['quiz', 'score', 'count']
+    list_select_related = ['quiz__user']
+
+
+@admin.register(UserQuizStats)
+class UserQuizStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'quiz', 'attempts', 'rolling_average', 'best_percentage', 'last_percentage']
+    list_select_related = ['user', 'quiz__user']
+
+
+@admin.register(StudyTimeDaily)
+class StudyTimeDailyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'subject', 'day', 'minutes', 'sessions']
+    list_filter = ['day']
+    list_select_related = ['user']
+
+
+@admin.register(StudyTimeRollup)
+class StudyTimeRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'subject', 'period', 'start', 'minutes', 'sessions']
+    list_filter = ['period', 'start']
+    list_select_related = ['user']
+
+
+@admin.register(Document)
+class DocumentAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'subject_id', 'size', 'created_at']
+    list_filter = ['subject_id', 'created_at']
+    search_fields = ['filename', 'key', 'sha256']
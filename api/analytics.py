@@ -0,0 +1,101 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import QuestionStats, QuizScoreBucket, UserQuizStats
+
+
+# Weight of the newest attempt in a user's rolling average
+ROLLING_ALPHA = 0.3
+
+
+def percentage(score, total):
+    """Same rounding as QuizAttempt.percentage"""
+    if total == 0:
+        return 0
+    return round((score / total) * 100)
+
+
+def _increment_by(field, lookup, deltas):
+    """F(field) plus a per-row delta chosen with CASE on `lookup`"""
+    return F(field) + Case(
+        *[When(**{lookup: value}, then=Value(delta)) for value, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def record_grades(quiz_id, key, grades):
+    """
+    Fold a batch of graded attempts on one quiz into the analytics tables.
+
+    `grades` is a list of (user_id, Grade) in submission order. Question and
+    histogram counters are bumped with one UPDATE each whatever the batch
+    size; rolling averages cost a read and a write per distinct user.
+    """
+    if not grades:
+        return
+
+    question_ids = [int(question_key) for question_key in key.question_keys]
+    correct = Counter()
+    for _, grade in grades:
+        for question_id, matched in zip(question_ids, grade.matches):
+            if matched:
+                correct[question_id] += 1
+
+    with transaction.atomic():
+        record_question_counts(dict.fromkeys(question_ids, len(grades)), correct)
+        record_scores(quiz_id, [(user_id, grade.score, grade.total) for user_id, grade in grades])
+
+
+def record_question_counts(attempts, correct):
+    """Add per-question attempt and correct counts, both keyed by question id"""
+    if not attempts:
+        return
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=question_id) for question_id in attempts],
+        ignore_conflicts=True
+    )
+    update = {'attempts': _increment_by('attempts', 'question_id', attempts)}
+    if correct:
+        update['correct'] = _increment_by('correct', 'question_id', correct)
+    QuestionStats.objects.filter(question_id__in=attempts).update(**update)
+
+
+def record_scores(quiz_id, scores):
+    """
+    Fold (user_id, score, total) for attempts on one quiz, in submission
+    order, into the score histogram and the users' running trends.
+    """
+    if not scores:
+        return
+
+    buckets = Counter(score for _, score, _ in scores)
+    by_user = defaultdict(list)
+    for user_id, score, total in scores:
+        by_user[user_id].append(percentage(score, total))
+
+    with transaction.atomic():
+        QuizScoreBucket.objects.bulk_create(
+            [QuizScoreBucket(quiz_id=quiz_id, score=score) for score in buckets],
+            ignore_conflicts=True
+        )
+        QuizScoreBucket.objects.filter(quiz_id=quiz_id, score__in=buckets).update(
+            count=_increment_by('count', 'score', buckets)
+        )
+
+        for user_id, percentages in by_user.items():
+            stats, _ = UserQuizStats.objects.select_for_update().get_or_create(
+                user_id=user_id, quiz_id=quiz_id
+            )
+            for value in percentages:
+                if stats.attempts == 0:
+                    stats.rolling_average = value
+                else:
+                    stats.rolling_average += ROLLING_ALPHA * (value - stats.rolling_average)
+                stats.attempts += 1
+                stats.total_percentage += value
+                stats.best_percentage = max(stats.best_percentage, value)
+                stats.last_percentage = value
+            stats.save()
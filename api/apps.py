@@ -7,6 +7,9 @@ class ApiConfig(AppConfig):
     name = 'api'
     
     def ready(self):
+        # Register cache invalidation signal handlers
+        from . import signals  # noqa: F401
+
         # Create users from environment variables on startup
         # Format: DASHBOARD_USERS = "username1:password1,username2:password2"
         # Or single user: DASHBOARD_USERNAME and DASHBOARD_PASSWORD
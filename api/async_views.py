@@ -0,0 +1,86 @@
+"""
+Views that need an ASGI server.
+
+These are only routed when settings.ASYNC_VIEWS is on (see DEPLOY.md). DRF
+views are synchronous, so these are plain Django views.
+"""
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+
+from .authentication import aget_token_user, get_token_key
+from .live import get_backend
+
+
+def api_response(data, status=200):
+    """JsonResponse encoded like DRF's JSONRenderer (compact, unescaped unicode)"""
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+async def aget_user_from_request(request):
+    """Async get_user_from_request"""
+    token_key = get_token_key(request)
+    if token_key:
+        return await aget_token_user(token_key)
+    return None
+
+
+# A comment line is sent after this many idle seconds so proxies keep the
+# stream open and disconnected clients are noticed
+STREAM_HEARTBEAT = 15
+
+# Streams end after this many seconds and the client reconnects. Django 4.2
+# doesn't notice a client disconnecting mid-stream, so this bounds how long an
+# abandoned stream lingers.
+STREAM_MAX_AGE = 5 * 60
+
+
+def sse_message(event):
+    data = json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+async def dashboard_events(subscription):
+    deadline = time.monotonic() + STREAM_MAX_AGE
+    try:
+        # Clients reconnect after 5s if the connection drops
+        yield 'retry: 5000\n\n'
+        while time.monotonic() < deadline:
+            event = await subscription.get(timeout=STREAM_HEARTBEAT)
+            yield sse_message(event) if event is not None else ': keepalive\n\n'
+    finally:
+        subscription.close()
+
+
+async def dashboard_stream(request):
+    """
+    Server-Sent Events stream of changes to the user's dashboard rows.
+
+    Each event is named after the section it touches (schedule, assignment,
+    goal, activity) and carries {'action': 'upsert' | 'delete', 'id', 'data'}.
+    A 'reset' event means events were dropped and the client should refetch
+    /api/dashboard/.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    user = await aget_user_from_request(request)
+    if not user:
+        return api_response({'error': 'Authentication required'}, status=401)
+
+    response = StreamingHttpResponse(
+        dashboard_events(get_backend().subscribe(user.pk)), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Token-authenticated, like the DRF views
+dashboard_stream.csrf_exempt = True
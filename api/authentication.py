@@ -0,0 +1,159 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+# User columns kept per token. Everything else on the returned User is
+# deferred and loaded on first access.
+CACHED_USER_FIELDS = ['id', 'username', 'is_active']
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a per-entry time to live"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# In-process layer. Its TTL is kept short because a logout handled by another
+# worker only reaches this process through the shared cache.
+_local_tokens = LRUCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_CACHE_LOCAL_TTL', 60),
+)
+
+
+def token_cache_key(key):
+    return f'authtoken:{key}'
+
+
+def get_token_key(request):
+    """Return the token key from an 'Authorization: Token <key>' header"""
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth_header.startswith('Token '):
+        parts = auth_header.split(' ')
+        if len(parts) == 2 and parts[1]:
+            return parts[1]
+    return None
+
+
+def _load_token_fields(key):
+    """Look a token up in the local LRU, the shared cache, then the database"""
+    fields = _local_tokens.get(key)
+    if fields is not None:
+        return fields
+
+    fields = cache.get(token_cache_key(key))
+    if fields is None:
+        try:
+            fields = Token.objects.values_list(
+                'user_id', 'user__username', 'user__is_active'
+            ).get(key=key)
+        except Token.DoesNotExist:
+            return None
+        cache.set(token_cache_key(key), fields, getattr(settings, 'TOKEN_CACHE_TTL', 3600))
+
+    _local_tokens.set(key, fields)
+    return fields
+
+
+async def _aload_token_fields(key):
+    """Async _load_token_fields"""
+    fields = _local_tokens.get(key)
+    if fields is not None:
+        return fields
+
+    fields = await cache.aget(token_cache_key(key))
+    if fields is None:
+        try:
+            fields = await Token.objects.values_list(
+                'user_id', 'user__username', 'user__is_active'
+            ).aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        await cache.aset(token_cache_key(key), fields, getattr(settings, 'TOKEN_CACHE_TTL', 3600))
+
+    _local_tokens.set(key, fields)
+    return fields
+
+
+def get_token_user(key):
+    """
+    Return the User owning a token key, or None if the token does not exist.
+
+    The user is built from cached columns only; most requests just need its
+    id to filter querysets, so no query is issued unless other fields are read.
+    """
+    fields = _load_token_fields(key)
+    if fields is None:
+        return None
+    return User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, fields)
+
+
+async def aget_token_user(key):
+    """Async get_token_user"""
+    fields = await _aload_token_fields(key)
+    if fields is None:
+        return None
+    return User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, fields)
+
+
+def invalidate_token(key):
+    """Forget a token key in this process and in the shared cache"""
+    _local_tokens.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication backed by the token cache.
+
+    request.auth is the token key rather than a Token instance, since the
+    Token row itself is never loaded on a cache hit.
+    """
+
+    def authenticate_credentials(self, key):
+        user = get_token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, key)
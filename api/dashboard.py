@@ -0,0 +1,161 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .activity_log import get_activity_feed
+from .metrics import stage
+from .models import (
+    ScheduleItem, Quiz, Assignment, WeeklyGoal, StudyActivity, SubjectPerformance, Exam
+)
+from .read_serializers import StudyActivityReadSerializer
+from .schedule_status import with_effective_status
+from .serializers import (
+    ScheduleItemSerializer, QuizListSerializer,
+    WeeklyGoalSerializer, SubjectPerformanceSerializer, ExamSerializer
+)
+
+
+# Models whose rows appear in the dashboard payload. Saving or deleting any of
+# them drops the owner's cached snapshot (see api/signals.py).
+DASHBOARD_MODELS = (
+    ScheduleItem, Quiz, Exam, Assignment, WeeklyGoal, StudyActivity, SubjectPerformance
+)
+
+
+def dashboard_cache_key(user_id, day):
+    """Cache key for a user's dashboard snapshot on a given day"""
+    return f'dashboard:{user_id}:{day.isoformat()}'
+
+
+def seconds_until_midnight(now):
+    """Seconds left in the current day, used as the snapshot timeout"""
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min, tzinfo=now.tzinfo)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+# Columns pulled for the nearest upcoming quiz and exam. They are read as
+# scalar subqueries inside the stats query, so the dashboard's query count does
+# not depend on whether the user has anything scheduled.
+UPCOMING_QUIZ_FIELDS = ('id', 'title', 'subject', 'topic', 'quiz_date')
+UPCOMING_EXAM_FIELDS = ('id', 'title', 'subject', 'exam_date')
+
+# Queries issued by build_dashboard: the stats query plus one per list section
+# (schedule, goals, performance). Recent activities come from the cached
+# activity feed, which costs one more query when it has to be refilled.
+DASHBOARD_QUERY_COUNT = 4
+DASHBOARD_COLD_QUERY_COUNT = DASHBOARD_QUERY_COUNT + 1
+
+RECENT_ACTIVITIES = 5
+
+
+def _upcoming_columns(model, date_field, fields, today, prefix):
+    """Scalar subqueries selecting the user's nearest upcoming row of a model"""
+    nearest = model.objects.filter(
+        user=OuterRef('pk'), **{f'{date_field}__gte': today}
+    ).order_by(date_field, 'pk')
+    return {
+        f'{prefix}{field}': Subquery(nearest.values(field)[:1])
+        for field in fields
+    }
+
+
+def _upcoming_instance(model, fields, stats, prefix):
+    """Rebuild an unsaved model instance from the stats row, or None"""
+    if stats[f'{prefix}id'] is None:
+        return None
+    return model(**{field: stats[f'{prefix}{field}'] for field in fields})
+
+
+def dashboard_stats_query(user, today):
+    """
+    Assignment counts and the next quiz and exam, as a single-row queryset.
+
+    Anchored on the user's row so users without assignments still get a row.
+    """
+    return User.objects.filter(pk=user.pk).values('pk').annotate(
+        assignments_total=Count('assignments'),
+        assignments_completed=Count('assignments', filter=Q(assignments__status='completed')),
+        **_upcoming_columns(Quiz, 'quiz_date', UPCOMING_QUIZ_FIELDS, today, 'quiz_'),
+        **_upcoming_columns(Exam, 'exam_date', UPCOMING_EXAM_FIELDS, today, 'exam_'),
+    )
+
+
+def dashboard_sections(user, today):
+    """The list sections of the dashboard, one query each"""
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        'schedule': ScheduleItem.objects.filter(user=user, date=today),
+        'goals': WeeklyGoal.objects.filter(user=user, week_start=week_start),
+        'performance': SubjectPerformance.objects.filter(user=user),
+    }
+
+
+def serialize_dashboard(stats, sections):
+    """
+    Build the payload from the stats row and the evaluated list sections.
+
+    sections['activities'] holds activity feed rows rather than instances.
+    """
+    upcoming_quiz = _upcoming_instance(Quiz, UPCOMING_QUIZ_FIELDS, stats, 'quiz_')
+    upcoming_exam = _upcoming_instance(Exam, UPCOMING_EXAM_FIELDS, stats, 'exam_')
+    total_assignments = stats['assignments_total']
+    completed_assignments = stats['assignments_completed']
+
+    return {
+        'schedule': ScheduleItemSerializer(sections['schedule'], many=True).data,
+        'upcomingQuiz': QuizListSerializer(upcoming_quiz).data if upcoming_quiz else None,
+        'upcomingExam': ExamSerializer(upcoming_exam).data if upcoming_exam else None,
+        'assignments': {
+            'completed': completed_assignments,
+            'total': total_assignments,
+            'remaining': total_assignments - completed_assignments
+        },
+        'weeklyGoals': WeeklyGoalSerializer(sections['goals'], many=True).data,
+        'recentActivities': StudyActivityReadSerializer.serialize(sections['activities']),
+        'subjectPerformance': SubjectPerformanceSerializer(sections['performance'], many=True).data
+    }
+
+
+def build_dashboard(user, today):
+    """Run the dashboard queries and return the serialized payload"""
+    stats = dashboard_stats_query(user, today).get()
+    sections = {name: list(queryset) for name, queryset in dashboard_sections(user, today).items()}
+    sections['activities'] = get_activity_feed(user.pk, RECENT_ACTIVITIES)
+    with stage('serialize'):
+        return serialize_dashboard(stats, sections)
+
+
+def current_schedule(payload, now):
+    """The payload with its schedule statuses derived for `now`"""
+    return dict(payload, schedule=with_effective_status(payload['schedule'], now))
+
+
+def get_dashboard(user):
+    """
+    Return the user's dashboard payload, served from the cache when possible.
+
+    Snapshots are keyed by date and expire at midnight, so values that depend
+    on today (the schedule, daysUntil, the current week's goals) roll over on
+    their own without any explicit invalidation. Schedule statuses follow the
+    clock during the day, so they are brought up to date on every read.
+    """
+    now = timezone.now()
+    today = now.date()
+    key = dashboard_cache_key(user.pk, today)
+
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_dashboard(user, today)
+        cache.set(key, payload, seconds_until_midnight(now))
+    return current_schedule(payload, now)
+
+
+def invalidate_dashboard(user_id):
+    """Drop today's cached snapshot for a user"""
+    if user_id is None:
+        return
+    today = timezone.now().date()
+    cache.delete(dashboard_cache_key(user_id, today))
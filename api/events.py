@@ -0,0 +1,162 @@
+"""
+Server-side activity events.
+
+Views call emit_activity() when something worth a line in the activity feed
+happens (a quiz submitted, an item completed, a goal moved). Events are
+handed to an in-process writer once the request's transaction commits; a
+background thread writes them with one bulk_create every
+ACTIVITY_EVENT_BATCH_SIZE events or ACTIVITY_EVENT_FLUSH_MS milliseconds,
+whichever comes first, so requests never wait on the insert. Buffered
+events are flushed when the process exits. ACTIVITY_EVENT_FLUSH_MS = 0
+writes each event synchronously instead (tests, management commands).
+
+While the database is unavailable events stay buffered, up to
+ACTIVITY_EVENT_MAX_PENDING per process; past that the oldest are dropped.
+Dropped and unwritten events are logged with their count.
+"""
+import atexit
+import logging
+import os
+import time
+from functools import partial
+from threading import Event, Lock, Thread
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import StudyActivity
+from .signals import bulk_changed
+
+
+logger = logging.getLogger(__name__)
+
+TEXT_MAX_LENGTH = StudyActivity._meta.get_field('text').max_length
+
+
+class ActivityEventWriter:
+    """Buffers StudyActivity rows and writes them in batches from a background thread"""
+
+    # Flushes tried by close() before the remaining events are given up
+    close_attempts = 3
+    close_retry_delay = 1
+
+    def __init__(self, batch_size, flush_interval, max_pending=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or batch_size * 100
+        self._reset()
+        # A forked worker starts with an empty buffer and its own thread
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pending = []
+        self._dropped = 0
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._thread = None
+        self._closed = False
+
+    def emit(self, activity):
+        with self._lock:
+            buffered = self.flush_interval and not self._closed
+            if buffered:
+                self._pending.append(activity)
+                self._trim()
+                full = len(self._pending) >= self.batch_size
+                if self._thread is None:
+                    self._thread = Thread(target=self._run, name='activity-event-writer', daemon=True)
+                    self._thread.start()
+        if not buffered:
+            # Synchronous mode, or the process is shutting down. This runs in
+            # an on_commit callback, after the request's own writes are
+            # committed, so a failure is logged rather than raised.
+            try:
+                self.write([activity])
+            except DatabaseError:
+                logger.exception('Could not write activity event for user %s: %s', activity.user_id, activity.text)
+        elif full:
+            self._wakeup.set()
+
+    def _trim(self):
+        """Drop the oldest events beyond max_pending; call with _lock held"""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self._dropped += overflow
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+        connection.close()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                dropped, self._dropped = self._dropped, 0
+            if dropped:
+                logger.error('Dropped %d activity events: more than %d were waiting', dropped, self.max_pending)
+            if not batch:
+                return 0
+            close_old_connections()
+            try:
+                return self.write(batch)
+            except DatabaseError:
+                # The database is unavailable: keep the events for the next flush
+                logger.exception('Could not write %d activity events; retrying', len(batch))
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._trim()
+                return 0
+
+    def write(self, batch):
+        try:
+            created = StudyActivity.objects.bulk_create(batch)
+        except IntegrityError:
+            # A row can't be written (e.g. its user was deleted since); save the rest
+            created = []
+            for activity in batch:
+                try:
+                    created.extend(StudyActivity.objects.bulk_create([activity]))
+                except IntegrityError:
+                    logger.warning('Dropped activity event for user %s: %s', activity.user_id, activity.text)
+        bulk_changed.send(
+            sender=StudyActivity, user_ids={activity.user_id for activity in created}, instances=created
+        )
+        return len(created)
+
+    def close(self):
+        """Stop the background thread and write whatever is still buffered"""
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5, self.flush_interval * 2))
+        for attempt in range(self.close_attempts):
+            if attempt:
+                time.sleep(self.close_retry_delay)
+            self.flush()
+            if not self._pending:
+                return
+        logger.error('Lost %d activity events at shutdown: the database is unavailable', len(self._pending))
+
+
+writer = ActivityEventWriter(
+    batch_size=getattr(settings, 'ACTIVITY_EVENT_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_EVENT_FLUSH_MS', 500) / 1000,
+    max_pending=getattr(settings, 'ACTIVITY_EVENT_MAX_PENDING', 10000),
+)
+atexit.register(writer.close)
+
+
+def emit_activity(user_id, text):
+    """Record an activity for the user once the current transaction commits"""
+    if user_id is None:
+        return
+    activity = StudyActivity(user_id=user_id, text=text[:TEXT_MAX_LENGTH], activity_time=timezone.now())
+    transaction.on_commit(partial(writer.emit, activity))
@@ -0,0 +1,82 @@
+from collections import namedtuple
+from operator import eq
+
+from django.core.cache import cache
+
+from .models import QuizQuestion
+
+
+# Stored in place of answers that are missing or not an option number, so
+# they never compare equal to a key entry (0-3)
+NO_ANSWER = 255
+
+Grade = namedtuple('Grade', ['score', 'total', 'matches'])
+
+
+class AnswerKey:
+    """
+    Precomputed answer key for a quiz.
+
+    Question ids are kept as the string keys used in submissions and the
+    correct options as a bytes array, so a submission is graded with a single
+    map(eq, ...) over two byte strings instead of a per-question Python loop.
+    """
+    __slots__ = ('question_keys', 'answers')
+
+    def __init__(self, question_keys, answers):
+        self.question_keys = question_keys
+        self.answers = answers
+
+    def __len__(self):
+        return len(self.answers)
+
+    @classmethod
+    def build(cls, quiz_id):
+        rows = QuizQuestion.objects.filter(quiz_id=quiz_id).order_by('order', 'pk').values_list(
+            'id', 'correct_answer'
+        )
+        return cls(
+            tuple(str(question_id) for question_id, _ in rows),
+            bytes(correct for _, correct in rows)
+        )
+
+    def grade(self, answers):
+        """Score a submission mapping question id -> chosen option"""
+        responses = bytes(map(_parse_answer, map(answers.get, self.question_keys)))
+        matches = list(map(eq, responses, self.answers))
+        return Grade(sum(matches), len(self.answers), matches)
+
+    def answered(self, answers):
+        """(question id, correct?) for the answers whose question is still on the key"""
+        return [
+            (int(question_key), _parse_answer(answers[question_key]) == correct)
+            for question_key, correct in zip(self.question_keys, self.answers)
+            if question_key in answers
+        ]
+
+
+def _parse_answer(value):
+    if value is None:
+        return NO_ANSWER
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return NO_ANSWER
+    return value if 0 <= value < NO_ANSWER else NO_ANSWER
+
+
+def answer_key_cache_key(quiz_id):
+    return f'quiz-answer-key:{quiz_id}'
+
+
+def get_answer_key(quiz_id):
+    """Return the quiz's answer key, building and caching it on first use"""
+    key = cache.get(answer_key_cache_key(quiz_id))
+    if key is None:
+        key = AnswerKey.build(quiz_id)
+        cache.set(answer_key_cache_key(quiz_id), key, None)
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    cache.delete(answer_key_cache_key(quiz_id))
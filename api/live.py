@@ -0,0 +1,164 @@
+"""
+Live dashboard updates.
+
+Model signals publish small per-row events for a user; the SSE endpoint in
+api/async_views.py subscribes to them. The backend is pluggable through
+settings.LIVE_UPDATES_BACKEND. The default, InProcessBackend, only reaches
+subscribers connected to the same process, so multi-worker deployments need
+a shared backend (e.g. one built on Postgres LISTEN/NOTIFY) for every client
+to see every change.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Assignment, ScheduleItem, StudyActivity, WeeklyGoal
+from .serializers import (
+    AssignmentSerializer, ScheduleItemSerializer, StudyActivitySerializer, WeeklyGoalSerializer
+)
+
+
+# Models streamed to clients, with the event name and serializer for each
+LIVE_MODELS = {
+    ScheduleItem: ('schedule', ScheduleItemSerializer),
+    Assignment: ('assignment', AssignmentSerializer),
+    WeeklyGoal: ('goal', WeeklyGoalSerializer),
+    StudyActivity: ('activity', StudyActivitySerializer),
+}
+
+# Events a slow client may fall behind by before it is told to refetch
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Sent instead of the missed events when a subscriber's queue overflows
+RESET_EVENT = {'type': 'reset'}
+
+
+def row_event(instance, action):
+    """Event for one changed row: 'upsert' carries the serialized row"""
+    name, serializer_class = LIVE_MODELS[type(instance)]
+    event = {'type': name, 'action': action, 'id': instance.pk}
+    if action == 'upsert':
+        event['data'] = serializer_class(instance).data
+    return event
+
+
+class Subscription:
+    """A queue of events for one connected client, read on its event loop"""
+
+    def __init__(self, backend, user_id):
+        self.backend = backend
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        """Queue an event; safe to call from any thread"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client fell behind: drop what it missed and have it refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET_EVENT)
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrives within timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class BaseLiveBackend:
+    """Interface for live update backends"""
+
+    def publish(self, user_id, event):
+        """Deliver an event to every subscription for user_id"""
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Return a Subscription; must be called from the client's event loop"""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBackend(BaseLiveBackend):
+    """Fan events out to subscribers in this process"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # Its event loop has shut down
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        with self._lock:
+            return user_id in self._subscriptions
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide live updates backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, 'LIVE_UPDATES_BACKEND', 'api.live.InProcessBackend')
+                _backend = import_string(backend_path)()
+    return _backend
+
+
+def publish_rows(instances, action):
+    """
+    Publish one event per changed row to its owner once the transaction commits.
+
+    Events are built right away: a deleted instance loses its pk afterwards.
+    """
+    backend = get_backend()
+    has_subscribers = getattr(backend, 'has_subscribers', None)
+    for instance in instances:
+        if instance.user_id is None:
+            continue
+        # Skip serializing rows nobody in this process is watching
+        if has_subscribers is not None and not has_subscribers(instance.user_id):
+            continue
+        event = row_event(instance, action)
+        transaction.on_commit(partial(backend.publish, instance.user_id, event))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from api.models import ScheduleItem
+from api.schedule_status import TRANSITIONS
+from api.signals import bulk_changed
+
+
+class Command(BaseCommand):
+    help = 'Move schedule items to in-progress and completed as their start and end times pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and advance statuses every this many seconds (default: run once)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500, help='Advanced items loaded per change notification'
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        if not options['interval']:
+            self.advance(timezone.now())
+            return
+
+        while True:
+            started = time.monotonic()
+            close_old_connections()
+            self.advance(timezone.now())
+            time.sleep(max(0, options['interval'] - (time.monotonic() - started)))
+
+    def advance(self, now):
+        """Apply every transition due at `now`, one UPDATE each"""
+        counts = []
+        for status, sources, due in TRANSITIONS:
+            with transaction.atomic():
+                # updated_at doubles as the marker of the rows this UPDATE touched
+                count = ScheduleItem.objects.filter(due(now), status__in=sources).update(status=status, updated_at=now)
+                if count:
+                    self.notify(ScheduleItem.objects.filter(due(now), status=status, updated_at=now))
+            counts.append(f'{count} {status}')
+        self.stdout.write(f'{now:%Y-%m-%d %H:%M}: ' + ', '.join(counts))
+
+    def notify(self, advanced):
+        """
+        Announce the advanced rows through bulk_changed, which refreshes the
+        owners' study time, caches, ETags and live streams
+        """
+        chunk = []
+        for item in advanced.order_by('date', 'start_time').iterator(chunk_size=self.chunk_size):
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                bulk_changed.send(sender=ScheduleItem, user_ids={item.user_id for item in chunk}, instances=chunk)
+                chunk = []
+        if chunk:
+            bulk_changed.send(sender=ScheduleItem, user_ids={item.user_id for item in chunk}, instances=chunk)
@@ -0,0 +1,77 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.conditional import bump_user_version_on_commit
+from api.models import ScheduleItem, StudyTimeDaily, StudyTimeRollup
+from api.study_time import COUNTED_STATUS, PERIODS, ROLLUP_PERIODS, session_minutes
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily, weekly and monthly study-time rollups from completed schedule items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows read and written per database round trip')
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+
+        with transaction.atomic():
+            user_ids = set(StudyTimeDaily.objects.values_list('user_id', flat=True).distinct())
+            StudyTimeDaily.objects.all().delete()
+            StudyTimeRollup.objects.all().delete()
+
+            # Items arrive grouped by (user, subject, day), so only one
+            # group and one chunk of output rows are held in memory
+            items = ScheduleItem.objects.filter(status=COUNTED_STATUS, user__isnull=False).order_by(
+                'user_id', 'subject', 'date'
+            ).values_list('user_id', 'subject', 'date', 'start_time', 'end_time').iterator(chunk_size=self.chunk_size)
+            written = self.write(StudyTimeDaily, self.daily_totals(items))
+
+            for period in ROLLUP_PERIODS:
+                days = StudyTimeDaily.objects.order_by('user_id', 'subject', 'day').values_list(
+                    'user_id', 'subject', 'day', 'minutes', 'sessions'
+                ).iterator(chunk_size=self.chunk_size)
+                self.write(StudyTimeRollup, self.period_totals(days, period))
+
+            user_ids |= set(StudyTimeDaily.objects.values_list('user_id', flat=True).distinct())
+            for user_id in user_ids:
+                bump_user_version_on_commit(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt study time: {written} days, '
+            f'{StudyTimeRollup.objects.filter(period="week").count()} weeks, '
+            f'{StudyTimeRollup.objects.filter(period="month").count()} months.'
+        ))
+
+    def daily_totals(self, items):
+        for (user_id, subject, day), group in groupby(items, key=lambda row: row[:3]):
+            minutes = [session_minutes(start_time, end_time) for *_, start_time, end_time in group]
+            yield StudyTimeDaily(
+                user_id=user_id, subject=subject, day=day, minutes=sum(minutes), sessions=len(minutes)
+            )
+
+    def period_totals(self, days, period):
+        start_of = PERIODS[period][0]
+        for (user_id, subject, start), group in groupby(days, key=lambda row: (row[0], row[1], start_of(row[2]))):
+            group = list(group)
+            yield StudyTimeRollup(
+                user_id=user_id, subject=subject, period=period, start=start,
+                minutes=sum(row[3] for row in group), sessions=sum(row[4] for row in group)
+            )
+
+    def write(self, model, objs):
+        """bulk_create objs chunk by chunk; returns the number written"""
+        written = 0
+        chunk = []
+        for obj in objs:
+            chunk.append(obj)
+            if len(chunk) >= self.chunk_size:
+                model.objects.bulk_create(chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            model.objects.bulk_create(chunk)
+            written += len(chunk)
+        return written
@@ -0,0 +1,148 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import (
+    ScheduleItem, Quiz, Assignment, WeeklyGoal, StudyActivity, Exam
+)
+
+
+INDEXED_MODELS = [ScheduleItem, Quiz, Assignment, WeeklyGoal, StudyActivity, Exam]
+
+
+def hot_queries(user, today):
+    """The per-user filters issued by the API, as (label, queryset) pairs"""
+    week_start = today - timedelta(days=today.weekday())
+    return [
+        ('schedule (user, date)', ScheduleItem.objects.filter(user=user, date=today)),
+        ('quiz (user, quiz_date)', Quiz.objects.filter(user=user, quiz_date__gte=today)[:1]),
+        ('exam (user, exam_date)', Exam.objects.filter(user=user, exam_date__gte=today)[:1]),
+        ('goals (user, week_start)', WeeklyGoal.objects.filter(user=user, week_start=week_start)),
+        ('assignments (user, status)', Assignment.objects.filter(user=user, status='completed')),
+        ('open assignments', Assignment.objects.filter(user=user).exclude(status='completed')),
+        ('activities (user, -activity_time)', StudyActivity.objects.filter(user=user)[:5]),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot-path queries with and without the composite indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Number of users to seed')
+        parser.add_argument('--rows', type=int, default=200, help='Rows per model per user')
+        parser.add_argument('--repeat', type=int, default=200, help='Timed runs per query')
+        parser.add_argument('--explain', action='store_true', help='Print EXPLAIN output for each query')
+
+    def handle(self, *args, **options):
+        # Everything happens inside one transaction that is rolled back, so the
+        # seeded rows and the dropped/recreated indexes never persist.
+        if connection.vendor == 'sqlite':
+            # The SQLite schema editor refuses to run inside atomic() otherwise
+            connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                users = self.seed(options['users'], options['rows'])
+                indexes = self.existing_indexes()
+                if not indexes:
+                    self.stdout.write(self.style.WARNING('No composite indexes found - run migrate first.'))
+
+                with connection.schema_editor() as editor:
+                    for model, index in indexes:
+                        editor.remove_index(model, index)
+                before = self.measure('without indexes', users, options)
+
+                with connection.schema_editor() as editor:
+                    for model, index in indexes:
+                        editor.add_index(model, index)
+                after = self.measure('with indexes', users, options)
+
+                self.report(before, after)
+                transaction.set_rollback(True)
+        finally:
+            if connection.vendor == 'sqlite':
+                connection.enable_constraint_checking()
+
+    def seed(self, n_users, n_rows):
+        self.stdout.write(f'Seeding {n_users} users x {n_rows} rows per model...')
+        today = timezone.now().date()
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(username=f'benchmark-{i}') for i in range(n_users)
+        ])
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__startswith='benchmark-'))
+
+        statuses = ['pending', 'in-progress', 'completed']
+        for user in users:
+            ScheduleItem.objects.bulk_create([
+                ScheduleItem(user=user, subject=f'Subject {i % 7}', start_time='09:00', end_time='10:00',
+                             date=today - timedelta(days=i % 90))
+                for i in range(n_rows)
+            ])
+            Quiz.objects.bulk_create([
+                Quiz(user=user, title=f'Quiz {i}', subject='Maths', topic='Topic',
+                     quiz_date=today + timedelta(days=i - n_rows // 2))
+                for i in range(n_rows)
+            ])
+            Exam.objects.bulk_create([
+                Exam(user=user, title=f'Exam {i}', subject='Physics',
+                     exam_date=today + timedelta(days=i - n_rows // 2))
+                for i in range(n_rows)
+            ])
+            Assignment.objects.bulk_create([
+                Assignment(user=user, title=f'Assignment {i}', subject='CS',
+                           due_date=today + timedelta(days=i % 60), status=statuses[i % 3])
+                for i in range(n_rows)
+            ])
+            WeeklyGoal.objects.bulk_create([
+                WeeklyGoal(user=user, text=f'Goal {i}', status=statuses[i % 3],
+                           week_start=today - timedelta(days=today.weekday() + 7 * (i % 52)))
+                for i in range(n_rows)
+            ])
+            StudyActivity.objects.bulk_create([
+                StudyActivity(user=user, text=f'Activity {i}', activity_time=now - timedelta(minutes=i))
+                for i in range(n_rows)
+            ])
+        return users
+
+    def existing_indexes(self):
+        """Composite indexes declared on the models that exist in the database"""
+        found = []
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                for index in model._meta.indexes:
+                    if index.name in constraints:
+                        found.append((model, index))
+        return found
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, label, users, options):
+        self.analyze()
+        today = timezone.now().date()
+        sample = users[len(users) // 2]
+        results = {}
+        for name, queryset in hot_queries(sample, today):
+            if options['explain']:
+                self.stdout.write(f'\n-- {label}: {name}')
+                self.stdout.write(queryset.explain())
+            start = time.perf_counter()
+            for i in range(options['repeat']):
+                user = users[i % len(users)]
+                list(dict(hot_queries(user, today))[name])
+            results[name] = (time.perf_counter() - start) / options['repeat'] * 1000
+        return results
+
+    def report(self, before, after):
+        self.stdout.write(f'\n{"query":<36}{"before ms":>12}{"after ms":>12}{"speedup":>10}')
+        for name, before_ms in before.items():
+            after_ms = after[name]
+            speedup = before_ms / after_ms if after_ms else float('inf')
+            self.stdout.write(f'{name:<36}{before_ms:>12.3f}{after_ms:>12.3f}{speedup:>9.1f}x')
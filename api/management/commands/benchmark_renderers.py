@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+def activity_payloads(n_rows):
+    """Serialized activities, plus raw rows still holding datetime objects"""
+    now = timezone.now()
+    rows = [
+        {'id': i, 'text': f'Studied chapter {i} – “notes”', 'activity_time': now - timedelta(minutes=i, microseconds=i)}
+        for i in range(n_rows)
+    ]
+    serialized = [
+        {'id': row['id'], 'text': row['text'], 'activityTime': row['activity_time'].isoformat().replace('+00:00', 'Z')}
+        for row in rows
+    ]
+    return serialized, rows
+
+
+def assignment_payloads(n_rows):
+    today = timezone.now().date()
+    rows = [
+        {
+            'id': i, 'title': f'Assignment {i}', 'subject': 'CS', 'status': ['pending', 'completed'][i % 2],
+            'description': 'Line one\nline two ', 'link': [None, 'https://example.com/a'][i % 2],
+            'due_date': today + timedelta(days=i % 60),
+        }
+        for i in range(n_rows)
+    ]
+    serialized = [
+        {**{key: value for key, value in row.items() if key != 'due_date'}, 'dueDate': row['due_date'].isoformat()}
+        for row in rows
+    ]
+    return serialized, rows
+
+
+class Command(BaseCommand):
+    help = 'Compare JSONRenderer and FastJSONRenderer on large activity and assignment lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per list')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed renders per payload')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: FastJSONRenderer falls back to JSONRenderer.'))
+
+        payloads = []
+        for name, build in [('activities', activity_payloads), ('assignments', assignment_payloads)]:
+            serialized, rows = build(options['rows'])
+            payloads.append((f'{name} (serialized)', serialized))
+            payloads.append((f'{name} (date objects)', rows))
+
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        mismatches = []
+        self.stdout.write(f'\n{"payload":<28}{"json ms":>10}{"fast ms":>10}{"speedup":>10}')
+        for label, data in payloads:
+            if fast.render(data) != standard.render(data):
+                mismatches.append(label)
+            json_ms = self.measure(standard, data, options['repeat'])
+            fast_ms = self.measure(fast, data, options['repeat'])
+            self.stdout.write(f'{label:<28}{json_ms:>10.2f}{fast_ms:>10.2f}{json_ms / fast_ms:>9.1f}x')
+
+        if mismatches:
+            raise CommandError(f'Output differs from JSONRenderer for: {", ".join(mismatches)}')
+        self.stdout.write(self.style.SUCCESS('\nFastJSONRenderer output matches JSONRenderer byte for byte.'))
+
+    def measure(self, renderer, data, repeat):
+        """Milliseconds per render"""
+        start = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(data)
+        return (time.perf_counter() - start) / repeat * 1000
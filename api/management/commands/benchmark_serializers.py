@@ -0,0 +1,137 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.models import (
+    ScheduleItem, Quiz, QuizQuestion, Assignment, WeeklyGoal, StudyActivity,
+    SubjectPerformance, Exam, Document
+)
+from api.read_serializers import (
+    ScheduleItemReadSerializer, QuizReadSerializer, QuizListReadSerializer,
+    AssignmentReadSerializer, WeeklyGoalReadSerializer, StudyActivityReadSerializer,
+    SubjectPerformanceReadSerializer, ExamReadSerializer, DocumentReadSerializer,
+    invalidate_quiz_questions
+)
+from api.serializers import (
+    ScheduleItemSerializer, QuizSerializer, QuizListSerializer,
+    AssignmentSerializer, WeeklyGoalSerializer, StudyActivitySerializer,
+    SubjectPerformanceSerializer, ExamSerializer, DocumentSerializer
+)
+
+
+def serializer_pairs(user):
+    """(label, queryset, DRF serializer, read serializer) for every list endpoint"""
+    return [
+        ('schedule', ScheduleItem.objects.filter(user=user), ScheduleItemSerializer, ScheduleItemReadSerializer),
+        ('quizzes (list)', Quiz.objects.filter(user=user), QuizListSerializer, QuizListReadSerializer),
+        ('quizzes (detail)', Quiz.objects.filter(user=user).prefetch_related(
+            Prefetch('questions', queryset=QuizQuestion.objects.order_by('order', 'pk'))
+        ), QuizSerializer, QuizReadSerializer),
+        ('assignments', Assignment.objects.filter(user=user), AssignmentSerializer, AssignmentReadSerializer),
+        ('goals', WeeklyGoal.objects.filter(user=user), WeeklyGoalSerializer, WeeklyGoalReadSerializer),
+        ('activities', StudyActivity.objects.filter(user=user), StudyActivitySerializer, StudyActivityReadSerializer),
+        ('performance', SubjectPerformance.objects.filter(user=user),
+         SubjectPerformanceSerializer, SubjectPerformanceReadSerializer),
+        ('exams', Exam.objects.filter(user=user), ExamSerializer, ExamReadSerializer),
+        ('documents', Document.objects.filter(user=user), DocumentSerializer, DocumentReadSerializer),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare the throughput of the read serializers with the DRF serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per model')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per quiz')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per serializer')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        # Seeded rows are rolled back at the end
+        with transaction.atomic():
+            user = self.seed(options['rows'], options['questions'])
+            self.stdout.write(f'\n{"endpoint":<20}{"rows":>7}{"DRF rows/s":>14}{"read rows/s":>14}{"speedup":>10}')
+            for label, queryset, drf_serializer, read_serializer in serializer_pairs(user):
+                rows = queryset.count()
+                drf_rate = rows / self.measure(
+                    lambda: renderer.render(drf_serializer(queryset.all(), many=True).data), options['repeat']
+                )
+                read_rate = rows / self.measure(
+                    lambda: renderer.render(read_serializer.serialize(read_serializer.values(queryset.all()))),
+                    options['repeat']
+                )
+                self.stdout.write(
+                    f'{label:<20}{rows:>7}{drf_rate:>14,.0f}{read_rate:>14,.0f}{read_rate / drf_rate:>9.1f}x'
+                )
+            # The rollback fires no signals, and the ids may be handed out again
+            for quiz_id in Quiz.objects.filter(user=user).values_list('pk', flat=True):
+                invalidate_quiz_questions(quiz_id)
+            transaction.set_rollback(True)
+
+    def measure(self, run, repeat):
+        """Seconds per run, including the query and JSON rendering"""
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - start) / repeat
+
+    def seed(self, n_rows, n_questions):
+        today = timezone.now().date()
+        now = timezone.now()
+        user = User.objects.create(username=f'benchmark-serializers-{now.timestamp()}')
+        statuses = ['pending', 'in-progress', 'completed']
+
+        ScheduleItem.objects.bulk_create([
+            ScheduleItem(user=user, subject=f'Subject {i % 7}', start_time='09:30', end_time='10:45:30',
+                         status=['upcoming', 'in-progress', 'completed'][i % 3], date=today)
+            for i in range(n_rows)
+        ])
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(user=user, title=f'Quiz {i}', subject='Maths', topic='Topic',
+                 quiz_date=today + timedelta(days=i - n_rows // 2))
+            for i in range(n_rows)
+        ])
+        if quizzes[0].pk is None:
+            quizzes = list(Quiz.objects.filter(user=user))
+        QuizQuestion.objects.bulk_create([
+            QuizQuestion(quiz=quiz, question_text=f'Question {i}?', option_a='A', option_b='B',
+                         option_c='C', option_d='D', correct_answer=i % 4, explanation='Because', order=i)
+            for quiz in quizzes
+            for i in range(n_questions)
+        ])
+        Assignment.objects.bulk_create([
+            Assignment(user=user, title=f'Assignment {i}', subject='CS', due_date=today + timedelta(days=i % 60),
+                       status=statuses[i % 3], description='Ünïcode "quoted"' if i % 2 else '',
+                       link=[None, '', 'https://example.com/a'][i % 3])
+            for i in range(n_rows)
+        ])
+        WeeklyGoal.objects.bulk_create([
+            WeeklyGoal(user=user, text=f'Goal {i}', status=statuses[i % 3],
+                       week_start=today - timedelta(days=today.weekday() + 7 * (i % 52)))
+            for i in range(n_rows)
+        ])
+        StudyActivity.objects.bulk_create([
+            StudyActivity(user=user, text=f'Activity {i}',
+                          activity_time=now - timedelta(minutes=i, microseconds=i * 7 % 1000000))
+            for i in range(n_rows)
+        ])
+        SubjectPerformance.objects.bulk_create([
+            SubjectPerformance(user=user, subject=f'Subject {i}', grade='A', percentage=i % 101)
+            for i in range(n_rows)
+        ])
+        Exam.objects.bulk_create([
+            Exam(user=user, title=f'Exam {i}', subject='Physics', exam_date=today + timedelta(days=i - n_rows // 2))
+            for i in range(n_rows)
+        ])
+        Document.objects.bulk_create([
+            Document(user=user, subject_id='general', key=f'{user.pk}/{i:064x}.pdf', filename=f'notes-{i}.pdf',
+                     size=1024 * i, sha256=f'{i:064x}' if i % 2 else '')
+            for i in range(n_rows)
+        ])
+        return user
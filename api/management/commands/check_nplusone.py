@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import (
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt, Assignment, WeeklyGoal, StudyActivity,
+    SubjectPerformance, Exam, QuestionStats, QuizScoreBucket, UserQuizStats, Document
+)
+from api.authentication import invalidate_token
+from api.nplusone import NPlusOneError
+from api.urls import router
+
+
+ISOLATED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'check-nplusone',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = 'Request every API and admin list page with N+1 detection set to raise'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=None,
+            help='Rows per model (default: enough to cross NPLUSONE_THRESHOLD)'
+        )
+
+    def handle(self, *args, **options):
+        # Lets the test client through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            self.check_pages(options)
+        finally:
+            teardown_test_environment()
+
+    def check_pages(self, options):
+        threshold = settings.NPLUSONE_THRESHOLD
+        n_rows = options['rows'] or threshold + 2
+        failures = []
+
+        # Seeded rows are rolled back at the end. The rollback fires no
+        # signals and SQLite hands the ids out again, so everything the pages
+        # cache (feeds, snapshots, answer keys, tokens...) goes to a private
+        # cache that is thrown away with them.
+        with transaction.atomic(), override_settings(
+            NPLUSONE_MODE='raise', PERF_SAMPLE_RATE=1.0, CACHES=ISOLATED_CACHES
+        ):
+            user = self.seed(n_rows)
+            token = Token.objects.create(user=user)
+            # A fresh client loads the middleware with the settings above
+            api = Client(headers={'Authorization': f'Token {token.key}'})
+            staff = Client()
+            staff.force_login(User.objects.create_superuser(f'{user.username}-admin'))
+
+            pages = [(api, url) for url in self.api_urls(user)] + [(staff, url) for url in self.admin_urls()]
+            for client, url in pages:
+                try:
+                    response = client.get(url)
+                except NPlusOneError as e:
+                    failures.append(str(e))
+                    self.stdout.write(self.style.ERROR(f'N+1  {url}'))
+                    continue
+                label = 'ok  ' if response.status_code < 400 else response.status_code
+                self.stdout.write(f'{label}  {url}')
+
+            cache.clear()
+            # The token's in-process entry outlives the cache override
+            invalidate_token(token.key)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('\n\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(
+            f'\nNo query shape repeated more than {threshold} times on any page.'
+        ))
+
+    def api_urls(self, user):
+        """List, detail and GET action URLs of every router viewset, plus the dashboard and analytics"""
+        urls = [reverse(name) for name in (
+            'dashboard-overview', 'study-time-daily', 'study-time-weekly', 'study-time-monthly'
+        )]
+        for prefix, viewset, basename in router.registry:
+            pk = self.sample_pk(viewset.queryset.model, user)
+            urls.append(reverse(f'{basename}-list'))
+            urls.append(reverse(f'{basename}-detail', args=[pk]))
+            for extra in viewset.get_extra_actions():
+                if 'get' not in extra.mapping:
+                    continue
+                args = [pk] if extra.detail else []
+                urls.append(reverse(f'{basename}-{extra.url_name}', args=args))
+        return urls
+
+    def admin_urls(self):
+        return [
+            reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            for model in admin.site._registry
+        ]
+
+    def sample_pk(self, model, user):
+        if model is QuizQuestion:
+            return QuizQuestion.objects.filter(quiz__user=user).values_list('pk', flat=True)[0]
+        return model.objects.filter(user=user).values_list('pk', flat=True)[0]
+
+    def seed(self, n_rows):
+        today = timezone.now().date()
+        now = timezone.now()
+        week_start = today - timedelta(days=today.weekday())
+        user = User.objects.create(username=f'check-nplusone-{now.timestamp()}')
+
+        ScheduleItem.objects.bulk_create([
+            ScheduleItem(user=user, subject=f'Subject {i}', start_time='09:00', end_time='10:00', date=today)
+            for i in range(n_rows)
+        ])
+        ScheduleTemplate.objects.bulk_create([
+            ScheduleTemplate(user=user, subject=f'Subject {i}', weekday=i % 7, start_time='11:00', end_time='12:00')
+            for i in range(n_rows)
+        ])
+        quizzes = [
+            Quiz.objects.create(user=user, title=f'Quiz {i}', subject='Maths', topic='Topic',
+                                quiz_date=today + timedelta(days=i))
+            for i in range(n_rows)
+        ]
+        questions = QuizQuestion.objects.bulk_create([
+            QuizQuestion(quiz=quiz, question_text=f'Question {i}?', option_a='A', option_b='B',
+                         option_c='C', option_d='D', correct_answer=i % 4, order=i)
+            for quiz in quizzes
+            for i in range(n_rows)
+        ])
+        if questions[0].pk is None:
+            questions = list(QuizQuestion.objects.filter(quiz__user=user))
+        QuestionStats.objects.bulk_create([
+            QuestionStats(question=question, attempts=2, correct=1) for question in questions
+        ])
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(user=user, quiz=quiz, score=i % n_rows, total_questions=n_rows, answers={})
+            for quiz in quizzes
+            for i in range(n_rows)
+        ])
+        QuizScoreBucket.objects.bulk_create([
+            QuizScoreBucket(quiz=quiz, score=i, count=1) for quiz in quizzes for i in range(n_rows)
+        ])
+        UserQuizStats.objects.bulk_create([
+            UserQuizStats(user=user, quiz=quiz, attempts=1, rolling_average=50,
+                          best_percentage=50, last_percentage=50)
+            for quiz in quizzes
+        ])
+        Assignment.objects.bulk_create([
+            Assignment(user=user, title=f'Assignment {i}', subject='CS', due_date=today + timedelta(days=i))
+            for i in range(n_rows)
+        ])
+        WeeklyGoal.objects.bulk_create([
+            WeeklyGoal(user=user, text=f'Goal {i}', week_start=week_start) for i in range(n_rows)
+        ])
+        StudyActivity.objects.bulk_create([
+            StudyActivity(user=user, text=f'Activity {i}', activity_time=now - timedelta(minutes=i))
+            for i in range(n_rows)
+        ])
+        SubjectPerformance.objects.bulk_create([
+            SubjectPerformance(user=user, subject=f'Subject {i}', grade='A', percentage=90)
+            for i in range(n_rows)
+        ])
+        Exam.objects.bulk_create([
+            Exam(user=user, title=f'Exam {i}', subject='Physics', exam_date=today + timedelta(days=i))
+            for i in range(n_rows)
+        ])
+        Document.objects.bulk_create([
+            Document(user=user, subject_id='general', key=f'{user.pk}/{i:064x}.pdf', filename=f'notes-{i}.pdf',
+                     size=1024)
+            for i in range(n_rows)
+        ])
+        return user
@@ -0,0 +1,94 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import StudyActivity, StudyActivityRollup, month_bucket
+
+
+def months_before(month, count):
+    """The first day of the month `count` months before `month`"""
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = 'Archive study activity older than the retention window into monthly rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=settings.ACTIVITY_RETENTION_MONTHS,
+            help='Whole months of raw activity to keep besides the current one'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Activities archived per database round trip')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived without changing anything')
+
+    def handle(self, *args, **options):
+        cutoff = months_before(month_bucket(timezone.now()), options['keep_months'])
+        months = list(
+            StudyActivity.objects.filter(month__lt=cutoff)
+            .order_by('month').values_list('month', flat=True).distinct()
+        )
+        if not months:
+            self.stdout.write(f'Nothing to archive before {cutoff:%Y-%m}.')
+            return
+
+        archived = 0
+        for month in months:
+            if options['dry_run']:
+                count = StudyActivity.objects.filter(month=month).count()
+            else:
+                count = self.compact_month(month, options['chunk_size'])
+            archived += count
+            self.stdout.write(f'{month:%Y-%m}: {count} activities')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {archived} activities from {len(months)} months before {cutoff:%Y-%m}.'
+        ))
+
+    def compact_month(self, month, chunk_size):
+        """Fold one month into rollups and delete its rows; returns the rows archived"""
+        activities = StudyActivity.objects.filter(month=month).order_by('pk')
+        totals = {}
+        archived = 0
+
+        with transaction.atomic():
+            last_pk = 0
+            while True:
+                chunk = list(activities.filter(pk__gt=last_pk).values_list('pk', 'user_id', 'activity_time')[:chunk_size])
+                if not chunk:
+                    break
+                for _, user_id, moment in chunk:
+                    count, first, last = totals.get(user_id, (0, moment, moment))
+                    totals[user_id] = (count + 1, min(first, moment), max(last, moment))
+                # A regular delete, so post_delete drops the owners' feeds,
+                # dashboards and ETags like any other deletion
+                pks = [pk for pk, _, _ in chunk]
+                StudyActivity.objects.filter(pk__in=pks).delete()
+                archived += len(chunk)
+                last_pk = pks[-1]
+
+            existing = {
+                rollup.user_id: rollup
+                for rollup in StudyActivityRollup.objects.select_for_update().filter(month=month)
+            }
+            created, updated = [], []
+            for user_id, (count, first, last) in totals.items():
+                rollup = existing.get(user_id)
+                if rollup is None:
+                    created.append(StudyActivityRollup(
+                        user_id=user_id, month=month, activities=count, first_activity=first, last_activity=last
+                    ))
+                    continue
+                # Activity added for the month after an earlier run archived it
+                rollup.activities += count
+                rollup.first_activity = min(rollup.first_activity, first)
+                rollup.last_activity = max(rollup.last_activity, last)
+                updated.append(rollup)
+            StudyActivityRollup.objects.bulk_create(created)
+            StudyActivityRollup.objects.bulk_update(updated, ['activities', 'first_activity', 'last_activity'])
+
+        return archived
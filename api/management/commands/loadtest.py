@@ -0,0 +1,68 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Load test an endpoint on one or more running servers and compare throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'base_urls', nargs='+',
+            help='Server roots to compare, e.g. http://localhost:8000 http://localhost:8001'
+        )
+        parser.add_argument('--path', default='/api/dashboard/', help='Endpoint to request')
+        parser.add_argument('--token', help='Auth token sent as "Authorization: Token <token>"')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per server')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests sent first')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f"Token {options['token']}"
+
+        for base_url in options['base_urls']:
+            url = base_url.rstrip('/') + options['path']
+            for _ in range(options['warmup']):
+                self.fetch(url, headers)
+            self.report(url, *self.run(url, headers, options['requests'], options['concurrency']))
+
+    def fetch(self, url, headers):
+        """Issue one GET; returns (status, seconds)"""
+        request = urllib.request.Request(url, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except urllib.error.URLError as e:
+            raise CommandError(f'{url}: {e.reason}')
+        return status, time.perf_counter() - start
+
+    def run(self, url, headers, count, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: self.fetch(url, headers), range(count)))
+        return results, time.perf_counter() - start
+
+    def report(self, url, results, elapsed):
+        latencies = sorted(seconds for _, seconds in results)
+        errors = sum(1 for status, _ in results if status >= 400)
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+
+        self.stdout.write(self.style.MIGRATE_HEADING(url))
+        self.stdout.write(
+            f'  {len(results)} requests in {elapsed:.2f}s: {len(results) / elapsed:.1f} req/s, {errors} errors'
+        )
+        self.stdout.write(
+            '  latency ms: p50 {:.1f}  p95 {:.1f}  p99 {:.1f}  max {:.1f}'.format(
+                percentiles[49] * 1000, percentiles[94] * 1000, percentiles[98] * 1000, latencies[-1] * 1000
+            )
+        )
@@ -0,0 +1,191 @@
+"""
+In-process request metrics.
+
+PerformanceMiddleware (api/middleware.py) samples requests and records them
+into the histograms here; metrics_view exposes them in the Prometheus text
+format. Each worker process keeps its own histograms, so Prometheus should
+scrape every worker (or sum across them).
+"""
+import hmac
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+METRIC_PREFIX = 'studydashboard'
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple"""
+
+    def __init__(self, name, help_text, buckets, labels=('view', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        """Prometheus text exposition lines for this histogram"""
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, counts, total, count in sorted(snapshot):
+            labels = ','.join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    f'{METRIC_PREFIX}_request_duration_seconds', 'Wall time of sampled requests.', SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram(
+    f'{METRIC_PREFIX}_db_queries', 'Database queries per sampled request.', QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    f'{METRIC_PREFIX}_db_duration_seconds', 'Time spent in database queries per sampled request.', SECONDS_BUCKETS
+)
+SERIALIZE_DURATION = Histogram(
+    f'{METRIC_PREFIX}_serialize_duration_seconds',
+    'Time spent serializing per sampled request, excluding queries it triggered.', SECONDS_BUCKETS
+)
+RENDER_DURATION = Histogram(
+    f'{METRIC_PREFIX}_render_duration_seconds', 'Time spent rendering the response body.', SECONDS_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    f'{METRIC_PREFIX}_response_size_bytes', 'Size of sampled non-streaming responses.', BYTES_BUCKETS
+)
+
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, SERIALIZE_DURATION, RENDER_DURATION, RESPONSE_SIZE)
+
+
+class RequestMetrics:
+    """Measurements for one sampled request"""
+    __slots__ = ('start', 'queries', 'db_time', 'stages', 'fingerprints')
+
+    def __init__(self, fingerprints=None):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.stages = {}
+        # Optional api.nplusone.QueryFingerprints fed every query
+        self.fingerprints = fingerprints
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            if self.fingerprints is not None:
+                self.fingerprints.record(sql)
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+# The RequestMetrics of the request being sampled, if any
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as a named stage of the current request.
+
+    Queries run inside the block are already counted as database time, so
+    they are left out of the stage. A no-op when the request isn't sampled.
+    """
+    metrics = current_request.get()
+    if metrics is None:
+        yield
+        return
+    start, db_time = time.perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start - (metrics.db_time - db_time))
+
+
+def record(view, method, metrics, size):
+    """Fold a finished request into the histograms"""
+    labels = (view, method)
+    REQUEST_DURATION.observe(labels, time.perf_counter() - metrics.start)
+    DB_QUERIES.observe(labels, metrics.queries)
+    DB_DURATION.observe(labels, metrics.db_time)
+    if 'serialize' in metrics.stages:
+        SERIALIZE_DURATION.observe(labels, metrics.stages['serialize'])
+    if 'render' in metrics.stages:
+        RENDER_DURATION.observe(labels, metrics.stages['render'])
+    if size is not None:
+        RESPONSE_SIZE.observe(labels, size)
+
+
+def server_timing(metrics):
+    """Server-Timing header value for a sampled request"""
+    entries = [
+        f'total;dur={(time.perf_counter() - metrics.start) * 1000:.1f}',
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+    ]
+    entries.extend(f'{name};dur={seconds * 1000:.1f}' for name, seconds in metrics.stages.items())
+    return ', '.join(entries)
+
+
+def render_prometheus():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint.
+
+    Allowed for 'Authorization: Bearer <METRICS_TOKEN>' when METRICS_TOKEN is
+    set, and for logged-in staff users.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    if not authorized and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
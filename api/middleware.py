@@ -0,0 +1,110 @@
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import nplusone
+from .metrics import RequestMetrics, current_request, record, server_timing
+
+
+class PerformanceMiddleware:
+    """
+    Sample requests and record wall time, query count, DB time, serializer and
+    render time and response size per view.
+
+    A sampled fraction (PERF_SAMPLE_RATE) of requests is measured, recorded
+    into the histograms in api/metrics.py and answered with a Server-Timing
+    header. Requests that aren't sampled cost one random() call. Measured
+    requests are also checked for N+1 queries (api/nplusone.py); with
+    NPLUSONE_MODE = 'raise' every request is measured and checked.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.0)
+        self.nplusone_mode = getattr(settings, 'NPLUSONE_MODE', 'log')
+        self.nplusone_threshold = getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+        if self.nplusone_mode == 'raise':
+            self.sample_rate = 1.0
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = request.perf_metrics = self.request_metrics()
+        token = current_request.set(metrics)
+        try:
+            with self.wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = request.perf_metrics = self.request_metrics()
+        token = current_request.set(metrics)
+        # The ORM runs in the request's sync thread, whose connections are
+        # not the event loop's, so the wrappers are installed there
+        stack = await sync_to_async(self.wrap_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def request_metrics(self):
+        fingerprints = None
+        if self.nplusone_mode != 'off':
+            fingerprints = nplusone.QueryFingerprints(self.nplusone_threshold)
+        return RequestMetrics(fingerprints)
+
+    def wrap_connections(self, metrics):
+        """Count and time every query on this thread's connections"""
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics))
+        return stack
+
+    def finish(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        record(view, request.method, metrics, size)
+        response['Server-Timing'] = server_timing(metrics)
+        if metrics.fingerprints is not None:
+            nplusone.check(view, request.method, metrics.fingerprints)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called before DRF / template responses are rendered, so the render
+        # can be timed
+        metrics = getattr(request, 'perf_metrics', None)
+        if metrics is not None:
+            render = response.render
+
+            def timed_render():
+                start = time.perf_counter()
+                try:
+                    return render()
+                finally:
+                    metrics.add_stage('render', time.perf_counter() - start)
+
+            response.render = timed_render
+        return response
@@ -0,0 +1,41 @@
+# Composite indexes for the per-user filters used by every endpoint
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_add_user_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduleitem',
+            index=models.Index(fields=['user', 'date', 'start_time'], name='schedule_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['user', 'quiz_date'], name='quiz_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['user', 'status', 'due_date'], name='assignment_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status', 'completed'), _negated=True), fields=['user', 'due_date'], name='assignment_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklygoal',
+            index=models.Index(fields=['user', 'week_start', 'status'], name='goal_user_week_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studyactivity',
+            index=models.Index(fields=['user', '-activity_time'], name='activity_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['user', 'exam_date'], name='exam_user_date_idx'),
+        ),
+    ]
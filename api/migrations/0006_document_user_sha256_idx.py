@@ -0,0 +1,17 @@
+# Index for content-hash lookups when deduplicating uploads
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['user', 'sha256'], name='document_user_sha256_idx'),
+        ),
+    ]
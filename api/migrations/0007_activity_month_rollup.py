@@ -0,0 +1,61 @@
+# Month bucket on study activities plus monthly rollups for archived activity
+
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_months(apps, schema_editor):
+    StudyActivity = apps.get_model('api', 'StudyActivity')
+    months = defaultdict(list)
+    for pk, moment in StudyActivity.objects.values_list('pk', 'activity_time').iterator():
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(dt_timezone.utc)
+        months[moment.date().replace(day=1)].append(pk)
+    for month, pks in months.items():
+        for start in range(0, len(pks), 500):
+            StudyActivity.objects.filter(pk__in=pks[start:start + 500]).update(month=month)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0006_document_user_sha256_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studyactivity',
+            name='month',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_months, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='studyactivity',
+            name='month',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='studyactivity',
+            index=models.Index(fields=['month', 'user'], name='activity_month_user_idx'),
+        ),
+        migrations.CreateModel(
+            name='StudyActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('activities', models.IntegerField(default=0)),
+                ('first_activity', models.DateTimeField()),
+                ('last_activity', models.DateTimeField()),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+    ]
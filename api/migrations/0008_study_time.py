@@ -0,0 +1,50 @@
+# Precomputed study time per day, week and month (see api/study_time.py)
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0007_activity_month_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudyTimeDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('day', models.DateField()),
+                ('minutes', models.IntegerField(default=0)),
+                ('sessions', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='study_time_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Study time (daily)',
+                'ordering': ['day', 'subject'],
+                'indexes': [models.Index(fields=['user', 'day'], name='study_time_user_day_idx')],
+                'unique_together': {('user', 'subject', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudyTimeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('start', models.DateField()),
+                ('minutes', models.IntegerField(default=0)),
+                ('sessions', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='study_time_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period', 'start', 'subject'],
+                'indexes': [models.Index(fields=['user', 'period', 'start'], name='study_time_user_period_idx')],
+                'unique_together': {('user', 'subject', 'period', 'start')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Catches the migrations up with Assignment.link and the per-user SubjectPerformance subjects
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_schedule_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='link',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='subjectperformance',
+            name='subject',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterUniqueTogether(
+            name='subjectperformance',
+            unique_together={('user', 'subject')},
+        ),
+    ]
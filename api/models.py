@@ -1,3 +1,5 @@
+from datetime import timezone as dt_timezone
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -27,11 +29,88 @@ class ScheduleItem(models.Model):
 
     class Meta:
         ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['user', 'date', 'start_time'], name='schedule_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.subject} ({self.start_time} - {self.end_time})"
 
 
+class ScheduleTemplate(models.Model):
+    """A weekly recurring schedule slot, expanded into the calendar at read time"""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='schedule_templates', null=True, blank=True)
+    subject = models.CharField(max_length=200)
+    weekday = models.IntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    starts_on = models.DateField(default=timezone.localdate)
+    ends_on = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+
+    def __str__(self):
+        return f"{get_user_display(self.user)}: {self.subject} every {self.get_weekday_display()} ({self.start_time} - {self.end_time})"
+
+
+class StudyTimeDaily(models.Model):
+    """Minutes of completed schedule items per user, subject and day (see api/study_time.py)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_time_days', null=True, blank=True)
+    subject = models.CharField(max_length=200)
+    day = models.DateField()
+    minutes = models.IntegerField(default=0)
+    sessions = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Study time (daily)"
+        ordering = ['day', 'subject']
+        unique_together = ['user', 'subject', 'day']
+        indexes = [
+            models.Index(fields=['user', 'day'], name='study_time_user_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{get_user_display(self.user)}: {self.subject} on {self.day} ({self.minutes} min)"
+
+
+class StudyTimeRollup(models.Model):
+    """StudyTimeDaily summed over the week or month starting on `start`"""
+    PERIOD_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_time_rollups', null=True, blank=True)
+    subject = models.CharField(max_length=200)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    start = models.DateField()
+    minutes = models.IntegerField(default=0)
+    sessions = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['period', 'start', 'subject']
+        unique_together = ['user', 'subject', 'period', 'start']
+        indexes = [
+            models.Index(fields=['user', 'period', 'start'], name='study_time_user_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{get_user_display(self.user)}: {self.subject}, {self.period} of {self.start} ({self.minutes} min)"
+
+
 class Quiz(models.Model):
     """Model for upcoming quizzes"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quizzes', null=True, blank=True)
@@ -46,6 +125,9 @@ class Quiz(models.Model):
     class Meta:
         verbose_name_plural = "Quizzes"
         ordering = ['quiz_date']
+        indexes = [
+            models.Index(fields=['user', 'quiz_date'], name='quiz_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.title} - {self.subject}"
@@ -115,6 +197,15 @@ class Assignment(models.Model):
 
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date'], name='assignment_user_status_idx'),
+            # Open assignments only - the rows the dashboard and reminders care about
+            models.Index(
+                fields=['user', 'due_date'],
+                name='assignment_user_open_idx',
+                condition=~models.Q(status='completed'),
+            ),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.title} - {self.subject}"
@@ -137,25 +228,75 @@ class WeeklyGoal(models.Model):
 
     class Meta:
         ordering = ['-week_start', 'status']
+        indexes = [
+            models.Index(fields=['user', 'week_start', 'status'], name='goal_user_week_idx'),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.text[:50]}... ({self.status})"
 
 
+def month_bucket(moment):
+    """First day of the UTC month a datetime falls in"""
+    if timezone.is_aware(moment):
+        moment = moment.astimezone(dt_timezone.utc)
+    return moment.date().replace(day=1)
+
+
+class StudyActivityQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(), which fills in the month bucket
+        objs = list(objs)
+        for obj in objs:
+            obj.month = month_bucket(obj.activity_time)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class StudyActivity(models.Model):
     """Model for tracking study activities"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_activities', null=True, blank=True)
     text = models.CharField(max_length=300)
     activity_time = models.DateTimeField(default=timezone.now)
+    # Month of activity_time, for history by month and for compact_activities
+    month = models.DateField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = StudyActivityQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Study Activities"
         ordering = ['-activity_time']
+        indexes = [
+            models.Index(fields=['user', '-activity_time'], name='activity_user_time_idx'),
+            models.Index(fields=['month', 'user'], name='activity_month_user_idx'),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.text[:50]}..."
 
+    def save(self, *args, **kwargs):
+        self.month = month_bucket(self.activity_time)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'activity_time' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'month'}
+        super().save(*args, **kwargs)
+
+
+class StudyActivityRollup(models.Model):
+    """Per-user monthly activity totals left behind when compact_activities archives old rows"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups', null=True, blank=True)
+    month = models.DateField()
+    activities = models.IntegerField(default=0)
+    first_activity = models.DateTimeField()
+    last_activity = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-month']
+        unique_together = ['user', 'month']
+
+    def __str__(self):
+        return f"{get_user_display(self.user)}: {self.activities} activities in {self.month:%Y-%m}"
+
 
 class SubjectPerformance(models.Model):
     """Model for tracking subject performance"""
@@ -183,6 +324,9 @@ class Exam(models.Model):
 
     class Meta:
         ordering = ['exam_date']
+        indexes = [
+            models.Index(fields=['user', 'exam_date'], name='exam_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{get_user_display(self.user)}: {self.title} - {self.subject}"
@@ -192,3 +336,83 @@ class Exam(models.Model):
         """Calculate days until the exam"""
         delta = self.exam_date - timezone.now().date()
         return max(0, delta.days)
+
+
+class QuestionStats(models.Model):
+    """Running attempt/correct counts for a quiz question, updated on each submit"""
+    question = models.OneToOneField(QuizQuestion, on_delete=models.CASCADE, related_name='stats')
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Question stats"
+
+    def __str__(self):
+        return f"{self.question}: {self.correct}/{self.attempts}"
+
+    @property
+    def correct_rate(self):
+        if self.attempts == 0:
+            return None
+        return round((self.correct / self.attempts) * 100)
+
+
+class QuizScoreBucket(models.Model):
+    """Number of attempts on a quiz that reached a given score (histogram bin)"""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='score_buckets')
+    score = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['score']
+        unique_together = ['quiz', 'score']
+
+    def __str__(self):
+        return f"{self.quiz_id} - score {self.score}: {self.count}"
+
+
+class UserQuizStats(models.Model):
+    """A user's running score trend on a quiz"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_stats', null=True, blank=True)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='user_stats')
+    attempts = models.IntegerField(default=0)
+    total_percentage = models.IntegerField(default=0)
+    rolling_average = models.FloatField(default=0)
+    best_percentage = models.IntegerField(default=0)
+    last_percentage = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "User quiz stats"
+        unique_together = ['user', 'quiz']
+
+    def __str__(self):
+        return f"{get_user_display(self.user)} on quiz {self.quiz_id}: {self.rolling_average:.0f}%"
+
+    @property
+    def average_percentage(self):
+        if self.attempts == 0:
+            return 0
+        return round(self.total_percentage / self.attempts)
+
+
+class Document(models.Model):
+    """A PDF stored in R2, recorded so listings and URLs don't need the object store"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='documents', null=True, blank=True)
+    subject_id = models.CharField(max_length=100, default='general')
+    key = models.CharField(max_length=500)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'subject_id', '-created_at'], name='document_user_subject_idx'),
+            models.Index(fields=['key'], name='document_key_idx'),
+            models.Index(fields=['user', 'sha256'], name='document_user_sha256_idx'),
+        ]
+
+    def __str__(self):
+        return f"{get_user_display(self.user)}: {self.filename} ({self.subject_id})"
@@ -0,0 +1,89 @@
+"""
+N+1 query detection.
+
+Requests instrumented by PerformanceMiddleware fingerprint every query they
+run. A fingerprint seen more than NPLUSONE_THRESHOLD times in one request is
+reported with the view and the stack that issued it. NPLUSONE_MODE decides
+what happens then: 'raise' (tests, `manage.py check_nplusone`) checks every
+request and fails it with NPlusOneError, 'log' checks sampled requests and
+logs a warning, 'off' disables detection.
+"""
+import logging
+import re
+import traceback
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Frames from these modules are the detector itself, not the culprit
+_OWN_MODULES = ('nplusone.py', 'metrics.py', 'middleware.py')
+
+# IN (%s, %s, ...) lists vary in length with the same query shape
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """The shape of a query: Django passes parameters separately, so only IN lists need folding"""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql))
+
+
+def project_stack():
+    """The current stack, limited to frames from this project's code"""
+    base_dir = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(_OWN_MODULES)
+    ]
+
+
+class QueryFingerprints:
+    """Per-request counts of query shapes"""
+    __slots__ = ('threshold', 'counts', 'stacks')
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = {}
+        self.stacks = {}
+
+    def record(self, sql):
+        key = fingerprint(sql)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == self.threshold + 1:
+            # Captured once, while the repeating code is still on the stack
+            self.stacks[key] = project_stack()
+
+    def offenders(self):
+        """(fingerprint, count, stack) for every shape over the threshold"""
+        return [(key, self.counts[key], stack) for key, stack in self.stacks.items()]
+
+
+def report(view, method, offenders):
+    """Human-readable description of a request's repeated queries"""
+    lines = [f'Possible N+1 queries in {method} {view}:']
+    for key, count, stack in offenders:
+        lines.append(f'  {count}x {key}')
+        lines.extend(
+            f'    {frame.filename}:{frame.lineno} in {frame.name}' for frame in stack
+        )
+    return '\n'.join(lines)
+
+
+def check(view, method, detector):
+    """Log or raise for the repeated queries of a finished request"""
+    offenders = detector.offenders()
+    if not offenders:
+        return
+    message = report(view, method, offenders)
+    if getattr(settings, 'NPLUSONE_MODE', 'log') == 'raise':
+        raise NPlusOneError(message)
+    logger.warning(message)
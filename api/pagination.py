@@ -0,0 +1,169 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class ModelCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the model's natural ordering.
+
+    The ordering is made unique with a trailing primary key, and cursors carry
+    the value of every ordering column. A page is fetched with a row
+    comparison on all of them, written out as (a > x) OR (a = x AND b > y)...
+    since the columns may sort in different directions, instead of DRF's
+    WHERE on the first column plus an OFFSET past the rows that tie with it.
+    Deep pages and pages inside long runs of equal values (every goal of the
+    week, every assignment due on the same day) cost the same as the first
+    one. Views can set `cursor_ordering` when the model's Meta.ordering leads
+    with a column the view already filters on (e.g. ScheduleItem's date).
+
+    Requests that pass ?limit= without a cursor get the pre-pagination
+    behaviour: a plain JSON list of at most `limit` rows. Like before
+    pagination, `limit` is not capped by max_page_size.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    limit_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is not None:
+            return list(queryset[:self.limit])
+
+        # CursorPagination.paginate_queryset, filtering on the whole position
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.keyset_filter(current_position, reverse))
+
+        # Positions are unique, so links never carry an offset; one is still
+        # honoured if a client sends it
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.limit is not None:
+            return Response(data)
+        return super().get_paginated_response(data)
+
+    def get_limit(self, request):
+        """Return the legacy ?limit= value, or None when paginating by cursor"""
+        value = request.query_params.get(self.limit_query_param)
+        if not value or self.cursor_query_param in request.query_params:
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            return None
+        if limit <= 0:
+            return None
+        return limit
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(getattr(view, 'cursor_ordering', None) or queryset.model._meta.ordering)
+        # A trailing primary key keeps the order total when values repeat.
+        # It is named by its column so .values() rows carry it too.
+        pk_name = queryset.model._meta.pk.attname
+        if not {'pk', '-pk', pk_name, f'-{pk_name}'} & set(ordering):
+            ordering.append(pk_name)
+        return tuple(ordering)
+
+    def keyset_filter(self, position, reverse):
+        """Rows after `position` in the ordering, or before it for a reverse cursor"""
+        condition = Q()
+        equal = {}
+        for order, value in zip(self.ordering, position):
+            name = order.lstrip('-')
+            descending = order.startswith('-') != reverse
+            condition |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # The strings go into the query as they are, so a tampered value
+        # would fail there; check each parses as its column's type
+        opts = self.model._meta
+        try:
+            for order, value in zip(self.ordering, position):
+                name = order.lstrip('-')
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+                if not isinstance(value, str):
+                    raise TypeError(value)
+                field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            cursor = cursor._replace(position=json.dumps(cursor.position))
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Every ordering column's value, as strings the field lookups accept"""
+        position = []
+        for order in ordering:
+            name = order.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(str(value))
+        return position
@@ -0,0 +1,254 @@
+"""
+Read-only serializers for list endpoints.
+
+They produce exactly the JSON of the serializers in serializers.py, but from
+.values() rows and a mapper compiled once per class, skipping DRF's per-field
+machinery. api/tests.py checks the output is byte-identical and
+`python manage.py benchmark_serializers` compares throughput.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import (
+    ScheduleItem, Quiz, QuizQuestion, Assignment, WeeklyGoal, StudyActivity,
+    SubjectPerformance, Exam, Document
+)
+from .schedule_status import effective_status
+from .storage import get_cached_object_url
+
+
+def iso_date(value):
+    return value.isoformat()
+
+
+def hours_minutes(value):
+    """ScheduleItemSerializer's str(time)[:5]"""
+    return value.isoformat()[:5]
+
+
+def iso_datetime(value):
+    """DRF DateTimeField output: current time zone, UTC written as Z"""
+    if settings.USE_TZ:
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def days_until(value):
+    """Quiz.days_until / Exam.days_until for the date column"""
+    return max(0, (value - timezone.now().date()).days)
+
+
+def as_list(*values):
+    return list(values)
+
+
+def compile_mapper(fields):
+    """
+    Build `row -> dict` for a list of (key, source, converter) specs.
+
+    The source is a column name, or a tuple of columns passed to the converter
+    as separate arguments. The mapper is a single dict display, so a row costs
+    one function call plus the converters.
+    """
+    namespace = {}
+    items = []
+    for index, (key, source, converter) in enumerate(fields):
+        columns = (source,) if isinstance(source, str) else source
+        args = ', '.join(f'row[{column!r}]' for column in columns)
+        if converter is None:
+            items.append(f'{key!r}: {args}')
+        else:
+            namespace[f'convert_{index}'] = converter
+            items.append(f'{key!r}: convert_{index}({args})')
+    return eval('lambda row: {%s}' % ', '.join(items), namespace)
+
+
+class ValuesSerializer:
+    """
+    Base class: subclasses set `model` and `fields`.
+
+    Field order matters, as it is the key order of the JSON output.
+    """
+    model = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        columns = []
+        for _, source, _ in cls.fields:
+            for column in (source,) if isinstance(source, str) else source:
+                if column not in columns:
+                    columns.append(column)
+        cls.columns = tuple(columns)
+        cls.to_representation = staticmethod(compile_mapper(cls.fields))
+
+    @classmethod
+    def values(cls, queryset):
+        """The queryset as rows carrying exactly the columns this serializer reads"""
+        return queryset.values(*cls.columns)
+
+    @classmethod
+    def serialize(cls, rows):
+        return list(map(cls.to_representation, rows))
+
+
+class ScheduleItemReadSerializer(ValuesSerializer):
+    model = ScheduleItem
+    fields = (
+        ('id', 'id', None),
+        ('subject', 'subject', None),
+        ('status', ('status', 'date', 'start_time', 'end_time'), effective_status),
+        ('date', 'date', iso_date),
+        ('startTime', 'start_time', hours_minutes),
+        ('endTime', 'end_time', hours_minutes),
+    )
+
+
+class QuizQuestionReadSerializer(ValuesSerializer):
+    model = QuizQuestion
+    fields = (
+        ('id', 'id', None),
+        ('options', ('option_a', 'option_b', 'option_c', 'option_d'), as_list),
+        ('correctAnswer', 'correct_answer', None),
+        ('explanation', 'explanation', None),
+        ('order', 'order', None),
+        ('question', 'question_text', None),
+    )
+
+
+class QuizListReadSerializer(ValuesSerializer):
+    model = Quiz
+    fields = (
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('subject', 'subject', None),
+        ('topic', 'topic', None),
+        ('quiz_date', 'quiz_date', iso_date),
+        ('daysUntil', 'quiz_date', days_until),
+    )
+
+
+def quiz_questions_cache_key(quiz_id):
+    return f'quiz-questions:{quiz_id}'
+
+
+def get_quiz_questions(quiz_ids):
+    """
+    Serialized questions for each quiz id, in quiz order.
+
+    Question lists are cached per quiz until a question changes, so starting
+    the same quiz again doesn't touch the database; the lists missing from the
+    cache are loaded together in one ordered query.
+    """
+    keys = {quiz_id: quiz_questions_cache_key(quiz_id) for quiz_id in quiz_ids}
+    cached = cache.get_many(keys.values())
+    questions = {quiz_id: cached[key] for quiz_id, key in keys.items() if key in cached}
+
+    missing = [quiz_id for quiz_id in keys if quiz_id not in questions]
+    if missing:
+        loaded = {quiz_id: [] for quiz_id in missing}
+        rows = QuizQuestion.objects.filter(quiz_id__in=missing).order_by('order', 'pk').values(
+            *QuizQuestionReadSerializer.columns, 'quiz_id'
+        )
+        for row in rows:
+            loaded[row['quiz_id']].append(QuizQuestionReadSerializer.to_representation(row))
+        cache.set_many({keys[quiz_id]: value for quiz_id, value in loaded.items()}, None)
+        questions.update(loaded)
+    return questions
+
+
+def invalidate_quiz_questions(quiz_id):
+    cache.delete(quiz_questions_cache_key(quiz_id))
+
+
+class QuizReadSerializer(ValuesSerializer):
+    """QuizSerializer, with questions from get_quiz_questions"""
+    model = Quiz
+    fields = (
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('subject', 'subject', None),
+        ('topic', 'topic', None),
+        ('quiz_date', 'quiz_date', iso_date),
+        ('timeLimit', 'time_limit', None),
+        ('daysUntil', 'quiz_date', days_until),
+    )
+
+    @classmethod
+    def serialize(cls, rows):
+        data = super().serialize(rows)
+        questions = get_quiz_questions([quiz['id'] for quiz in data])
+        for quiz in data:
+            quiz['questions'] = questions[quiz['id']]
+        return data
+
+
+class AssignmentReadSerializer(ValuesSerializer):
+    model = Assignment
+    fields = (
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('subject', 'subject', None),
+        ('status', 'status', None),
+        ('description', 'description', None),
+        ('link', 'link', None),
+        ('dueDate', 'due_date', iso_date),
+    )
+
+
+class WeeklyGoalReadSerializer(ValuesSerializer):
+    model = WeeklyGoal
+    fields = (
+        ('id', 'id', None),
+        ('text', 'text', None),
+        ('status', 'status', None),
+        ('weekStart', 'week_start', iso_date),
+    )
+
+
+class StudyActivityReadSerializer(ValuesSerializer):
+    model = StudyActivity
+    fields = (
+        ('id', 'id', None),
+        ('text', 'text', None),
+        ('activityTime', 'activity_time', iso_datetime),
+    )
+
+
+class SubjectPerformanceReadSerializer(ValuesSerializer):
+    model = SubjectPerformance
+    fields = (
+        ('id', 'id', None),
+        ('subject', 'subject', None),
+        ('grade', 'grade', None),
+        ('percentage', 'percentage', None),
+    )
+
+
+class ExamReadSerializer(ValuesSerializer):
+    model = Exam
+    fields = (
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('subject', 'subject', None),
+        ('examDate', 'exam_date', iso_date),
+        ('daysUntil', 'exam_date', days_until),
+    )
+
+
+class DocumentReadSerializer(ValuesSerializer):
+    model = Document
+    fields = (
+        ('id', 'id', None),
+        ('subjectId', 'subject_id', None),
+        ('filename', 'filename', None),
+        ('size', 'size', None),
+        ('sha256', 'sha256', None),
+        ('createdAt', 'created_at', iso_datetime),
+        ('url', 'key', get_cached_object_url),
+    )
@@ -0,0 +1,51 @@
+"""
+Faster JSON rendering.
+
+FastJSONRenderer encodes with orjson when it is installed and falls back to
+DRF's JSONRenderer otherwise, or whenever a payload needs something orjson
+can't reproduce exactly (indentation, ASCII-only output, unsupported types).
+Views opt in through `renderer_classes`; see API_RENDERER_CLASSES.
+"""
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+if orjson is not None:
+    # Dates and times go through DRF's encoder so they keep its exact format
+    # (e.g. UTC datetimes ending in Z); int dict keys become strings like json
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with the same output, encoded by orjson when available"""
+
+    def __init__(self):
+        super().__init__()
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError: let the stdlib path render it or raise
+            # DRF's own error
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-safe escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+# Renderers for views that opt in: FastJSONRenderer in place of JSONRenderer,
+# keeping the browsable API
+API_RENDERER_CLASSES = [FastJSONRenderer, BrowsableAPIRenderer]
@@ -0,0 +1,124 @@
+"""
+Calendar reads: schedule items for a date range, plus recurring templates.
+
+Concrete items come from one scan of the (user, date, start_time) index.
+ScheduleTemplate rows are never materialized; they are expanded into the
+requested range at read time, and occurrences get the status the clock
+implies (api/schedule_status.py) as they are returned.
+
+A user's templates are cached together with a token, and each expansion is
+memoized under that token. Editing a template drops the cached templates
+(see api/signals.py), which orphans every memoized expansion at once.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import ScheduleTemplate
+from .read_serializers import ScheduleItemReadSerializer, hours_minutes
+from .schedule_status import clock_status
+
+
+TEMPLATE_FIELDS = ('id', 'subject', 'weekday', 'start_time', 'end_time', 'starts_on', 'ends_on')
+
+# Memoized expansions outlive template edits only as orphans, so a day is plenty
+EXPANSION_TIMEOUT = 24 * 3600
+
+
+def templates_cache_key(user_id):
+    return f'schedule-templates:{user_id}'
+
+
+def get_templates(user_id):
+    """(token, template rows) for a user; the token changes whenever the rows do"""
+    key = templates_cache_key(user_id)
+    entry = cache.get(key)
+    if entry is None:
+        rows = list(ScheduleTemplate.objects.filter(user_id=user_id).values(*TEMPLATE_FIELDS))
+        entry = (time.time_ns(), rows)
+        cache.set(key, entry, None)
+    return entry
+
+
+def invalidate_templates(user_id):
+    cache.delete(templates_cache_key(user_id))
+
+
+def expand_templates(templates, first, last):
+    """Occurrences of the templates between first and last (inclusive), keyed by ISO date"""
+    occurrences = {}
+    for template in templates:
+        start = max(first, template['starts_on'])
+        end = min(last, template['ends_on']) if template['ends_on'] else last
+        day = start + timedelta(days=(template['weekday'] - start.weekday()) % 7)
+        while day <= end:
+            date = day.isoformat()
+            occurrences.setdefault(date, []).append({
+                'id': None,
+                'subject': template['subject'],
+                'status': 'upcoming',
+                'date': date,
+                'startTime': hours_minutes(template['start_time']),
+                'endTime': hours_minutes(template['end_time']),
+                'templateId': template['id'],
+            })
+            day += timedelta(days=7)
+    return occurrences
+
+
+def get_occurrences(user_id, first, last):
+    """expand_templates for the user's templates, memoized per range"""
+    token, templates = get_templates(user_id)
+    if not templates:
+        return {}
+    key = f'schedule-expansion:{user_id}:{token}:{first.isoformat()}:{last.isoformat()}'
+    occurrences = cache.get(key)
+    if occurrences is None:
+        occurrences = expand_templates(templates, first, last)
+        cache.set(key, occurrences, EXPANSION_TIMEOUT)
+    return occurrences
+
+
+def slot(item):
+    return (item['subject'], item['startTime'], item['endTime'])
+
+
+def calendar_days(items, user_id, first, last):
+    """
+    Every day from first to last with its schedule, as [{'date', 'items'}].
+
+    `items` is the user's ScheduleItem queryset. A concrete item in the same
+    slot as a template occurrence (e.g. one the user has completed) replaces
+    the occurrence.
+    """
+    rows = ScheduleItemReadSerializer.values(
+        items.filter(date__range=(first, last)).order_by('date', 'start_time')
+    )
+    by_date = {}
+    for item in ScheduleItemReadSerializer.serialize(rows):
+        by_date.setdefault(item['date'], []).append(item)
+    occurrences = get_occurrences(user_id, first, last) if user_id is not None else {}
+    now = timezone.now()
+
+    days = []
+    day = first
+    while day <= last:
+        date = day.isoformat()
+        scheduled = by_date.get(date, [])
+        if date in occurrences:
+            taken = {slot(item) for item in scheduled}
+            # Memoized occurrences are stored as upcoming. They have no stored
+            # status to keep, so even old ones take the clock's.
+            pending = [
+                dict(item, status=clock_status(item['date'], item['startTime'], item['endTime'], now))
+                for item in occurrences[date] if slot(item) not in taken
+            ]
+            scheduled = sorted(
+                scheduled + pending,
+                key=lambda item: item['startTime']
+            )
+        days.append({'date': date, 'items': scheduled})
+        day += timedelta(days=1)
+    return days
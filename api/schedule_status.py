@@ -0,0 +1,122 @@
+"""
+Time-driven schedule item statuses.
+
+An item is upcoming until its start time, in progress until its end time and
+completed after that; an end before the start runs past midnight. Statuses
+only move forward, so a stored status ahead of the clock (an item marked
+completed early) wins.
+
+Reads derive the effective status from the stored one and the clock without
+writing, so responses are right between runs of
+`manage.py advance_schedule_status`, which persists the transitions in bulk
+(one UPDATE per transition) so that queries and study-time totals see them.
+Times are wall-clock times in the current time zone.
+
+The clock only advances items from the last SCHEDULE_AUTO_ADVANCE_DAYS days.
+Older items keep their stored status, so sessions from before the command
+first ran (or from a long outage) aren't counted as studied just because
+their time has passed.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+STATUS_ORDER = {'upcoming': 0, 'in-progress': 1, 'completed': 2}
+
+# Start and end times are entered to the minute, so a derived status can only
+# change on a minute boundary. ETags of responses showing statuses change
+# this often as well (see api/conditional.py).
+STATUS_INTERVAL = 60
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _as_minute(value):
+    """A time, or its ISO string, truncated to the minute as responses show it"""
+    value = time.fromisoformat(value) if isinstance(value, str) else value
+    return value.replace(second=0, microsecond=0)
+
+
+def first_advanced_day(today):
+    """The earliest date whose items the clock still advances"""
+    return today - timedelta(days=settings.SCHEDULE_AUTO_ADVANCE_DAYS)
+
+
+def clock_status(day, start_time, end_time, now=None):
+    """
+    The status the clock implies for a session; accepts ISO strings as well.
+
+    Times are compared to the minute, so the raw column values and the HH:MM
+    strings of a serialized item give the same answer.
+    """
+    tz = timezone.get_current_timezone()
+    day, start_time, end_time = _as_date(day), _as_minute(start_time), _as_minute(end_time)
+    start = datetime.combine(day, start_time, tzinfo=tz)
+    end = datetime.combine(day, end_time, tzinfo=tz)
+    if end < start:
+        end += timedelta(days=1)
+    now = now or timezone.now()
+    if now >= end:
+        return 'completed'
+    if now >= start:
+        return 'in-progress'
+    return 'upcoming'
+
+
+def effective_status(status, day, start_time, end_time, now=None):
+    """The stored status, or the clock's if that is further along and the item is recent"""
+    if status == 'completed':
+        return status
+    now = now or timezone.now()
+    if _as_date(day) < first_advanced_day(timezone.localdate(now)):
+        return status
+    clock = clock_status(day, start_time, end_time, now)
+    return clock if STATUS_ORDER[clock] > STATUS_ORDER.get(status, 0) else status
+
+
+def with_effective_status(items, now=None):
+    """Serialized schedule items (date, startTime, endTime) with their statuses brought up to date"""
+    now = now or timezone.now()
+    return [
+        dict(item, status=effective_status(item['status'], item['date'], item['startTime'], item['endTime'], now))
+        for item in items
+    ]
+
+
+def _local_clock(now):
+    # The last instant of the current minute: a time at or before it has the
+    # same minute as now or an earlier one, which is what clock_status checks
+    local = timezone.localtime(now)
+    return local.date(), local.time().replace(second=59, microsecond=999999)
+
+
+def ended(now):
+    """Recent items whose end time has passed at `now`, as a filter"""
+    today, clock = _local_clock(now)
+    yesterday = today - timedelta(days=1)
+    overnight = Q(end_time__lt=F('start_time'))
+    return Q(date__gte=first_advanced_day(today)) & (
+        Q(date__lt=yesterday)
+        | Q(date=yesterday) & (~overnight | Q(end_time__lte=clock))
+        | Q(date=today) & ~overnight & Q(end_time__lte=clock)
+    )
+
+
+def started(now):
+    """Recent items whose start time has passed at `now`, as a filter"""
+    today, clock = _local_clock(now)
+    return Q(date__gte=first_advanced_day(today)) & (Q(date__lt=today) | Q(date=today, start_time__lte=clock))
+
+
+# (new status, statuses it replaces, filter for the items that are due), in
+# the order they are applied: an item that ended since the last run goes
+# straight to completed and is never picked up as in progress
+TRANSITIONS = (
+    ('completed', ('upcoming', 'in-progress'), ended),
+    ('in-progress', ('upcoming',), started),
+)
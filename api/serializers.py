@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from .models import (
-    ScheduleItem, Quiz, QuizQuestion, QuizAttempt,
-    Assignment, WeeklyGoal, StudyActivity, SubjectPerformance, Exam
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt,
+    Assignment, WeeklyGoal, StudyActivity, StudyActivityRollup, SubjectPerformance, Exam,
+    QuizScoreBucket, UserQuizStats, Document
 )
+from .schedule_status import effective_status
+from .storage import MAX_PDF_SIZE, get_cached_object_url
 
 
 class ScheduleItemSerializer(serializers.ModelSerializer):
@@ -15,6 +18,7 @@ class ScheduleItemSerializer(serializers.ModelSerializer):
         # Convert to camelCase for frontend
         data['startTime'] = str(data.pop('start_time', ''))[:5]
         data['endTime'] = str(data.pop('end_time', ''))[:5]
+        data['status'] = effective_status(data['status'], data['date'], data['startTime'], data['endTime'])
         return data
     
     def to_internal_value(self, data):
@@ -28,6 +32,24 @@ class ScheduleItemSerializer(serializers.ModelSerializer):
         return super().to_internal_value(internal)
 
 
+class ScheduleTemplateSerializer(serializers.ModelSerializer):
+    startTime = serializers.TimeField(source='start_time', format='%H:%M')
+    endTime = serializers.TimeField(source='end_time', format='%H:%M')
+    startsOn = serializers.DateField(source='starts_on', required=False)
+    endsOn = serializers.DateField(source='ends_on', required=False, allow_null=True)
+    
+    class Meta:
+        model = ScheduleTemplate
+        fields = ['id', 'subject', 'weekday', 'startTime', 'endTime', 'startsOn', 'endsOn']
+    
+    def validate(self, attrs):
+        starts_on = attrs.get('starts_on', getattr(self.instance, 'starts_on', None))
+        ends_on = attrs.get('ends_on', getattr(self.instance, 'ends_on', None))
+        if starts_on and ends_on and ends_on < starts_on:
+            raise serializers.ValidationError({'endsOn': 'Must not be before startsOn'})
+        return attrs
+
+
 class QuizQuestionSerializer(serializers.ModelSerializer):
     options = serializers.SerializerMethodField()
     correctAnswer = serializers.IntegerField(source='correct_answer')
@@ -72,6 +94,38 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         fields = ['id', 'quiz', 'score', 'total_questions', 'answers', 'completed_at', 'percentage']
 
 
+class QuestionAnalyticsSerializer(serializers.Serializer):
+    """Per-question counters; expects questions annotated with attempts/correct"""
+    questionId = serializers.IntegerField(source='id')
+    order = serializers.IntegerField()
+    question = serializers.CharField(source='question_text')
+    attempts = serializers.IntegerField()
+    correct = serializers.IntegerField()
+    correctRate = serializers.SerializerMethodField()
+    
+    def get_correctRate(self, obj):
+        if obj.attempts == 0:
+            return None
+        return round((obj.correct / obj.attempts) * 100)
+
+
+class QuizScoreBucketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizScoreBucket
+        fields = ['score', 'count']
+
+
+class UserQuizStatsSerializer(serializers.ModelSerializer):
+    averagePercentage = serializers.IntegerField(source='average_percentage', read_only=True)
+    rollingAverage = serializers.FloatField(source='rolling_average')
+    bestPercentage = serializers.IntegerField(source='best_percentage')
+    lastPercentage = serializers.IntegerField(source='last_percentage')
+    
+    class Meta:
+        model = UserQuizStats
+        fields = ['attempts', 'averagePercentage', 'rollingAverage', 'bestPercentage', 'lastPercentage']
+
+
 class AssignmentSerializer(serializers.ModelSerializer):
     # Explicitly declare link field to allow blank/null values
     link = serializers.URLField(required=False, allow_blank=True, allow_null=True)
@@ -116,6 +170,21 @@ class StudyActivitySerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'activityTime']
 
 
+class StudyActivityMonthSerializer(serializers.ModelSerializer):
+    """A month of activity history, from live rows (unsaved) or an archived rollup"""
+    month = serializers.DateField(format='%Y-%m')
+    firstActivity = serializers.DateTimeField(source='first_activity')
+    lastActivity = serializers.DateTimeField(source='last_activity')
+    archived = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = StudyActivityRollup
+        fields = ['month', 'activities', 'firstActivity', 'lastActivity', 'archived']
+    
+    def get_archived(self, obj):
+        return obj.pk is not None
+
+
 class SubjectPerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = SubjectPerformance
@@ -131,6 +200,54 @@ class ExamSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'subject', 'examDate', 'daysUntil']
 
 
+class DocumentSerializer(serializers.ModelSerializer):
+    subjectId = serializers.CharField(source='subject_id')
+    createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+    url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Document
+        fields = ['id', 'subjectId', 'filename', 'size', 'sha256', 'createdAt', 'url']
+    
+    def get_url(self, obj):
+        return get_cached_object_url(obj.key)
+
+
+class PresignUploadSerializer(serializers.Serializer):
+    """Body of a presigned upload request"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(
+        min_value=1, max_value=MAX_PDF_SIZE,
+        error_messages={'max_value': 'File too large. Max 50MB', 'min_value': 'File is empty'}
+    )
+    # Becomes a path segment of the object key
+    subject_id = serializers.RegexField(
+        r'^[A-Za-z0-9_-]{1,100}\Z', default='general',
+        error_messages={'invalid': 'subject_id may only contain letters, digits, - and _'}
+    )
+    sha256 = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}\Z', required=False, allow_blank=True,
+        error_messages={'invalid': 'sha256 must be 64 hex digits'}
+    )
+    
+    def validate_filename(self, value):
+        if not value.lower().endswith('.pdf'):
+            raise serializers.ValidationError('Only PDF files allowed')
+        return value
+
+
+class UploadPartSerializer(serializers.Serializer):
+    """A multipart part the client sent, as S3 acknowledged it"""
+    partNumber = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField()
+
+
+class CompleteUploadSerializer(serializers.Serializer):
+    """Body of a presigned upload completion"""
+    ticket = serializers.CharField()
+    parts = UploadPartSerializer(many=True, default=list)
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     """Serializer for dashboard statistics"""
     assignments_completed = serializers.IntegerField()
@@ -0,0 +1,200 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from .activity_log import invalidate_activity_feed
+from .authentication import invalidate_token
+from .conditional import bump_user_version_on_commit
+from .dashboard import DASHBOARD_MODELS, invalidate_dashboard
+from .grading import invalidate_answer_key
+from .live import LIVE_MODELS, publish_rows
+from .models import (
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt, Assignment, WeeklyGoal,
+    StudyActivity, SubjectPerformance, Exam, UserQuizStats, Document
+)
+from .read_serializers import invalidate_quiz_questions
+from .schedule_calendar import invalidate_templates
+from .study_time import COUNTED_STATUS, refresh_study_time, study_time_key
+
+
+# Sent after bulk_create/bulk_update, which skip post_save. Receivers get
+# sender=<model>, user_ids=<set of owner ids> and instances=<list>.
+bulk_changed = Signal()
+
+
+def invalidate_dashboard_on_change(sender, instance, **kwargs):
+    """Drop the owner's dashboard snapshot when one of its rows changes"""
+    invalidate_dashboard(instance.user_id)
+
+
+@receiver(bulk_changed)
+def invalidate_dashboard_on_bulk_change(sender, user_ids, **kwargs):
+    if sender in DASHBOARD_MODELS:
+        for user_id in user_ids:
+            invalidate_dashboard(user_id)
+
+
+# Connected per model so unrelated models keep Django's fast-delete path
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard_on_change, sender=model)
+    post_delete.connect(invalidate_dashboard_on_change, sender=model)
+
+
+def publish_saved_row(sender, instance, **kwargs):
+    """Push the saved row to the owner's live dashboard streams"""
+    publish_rows([instance], 'upsert')
+
+
+def publish_deleted_row(sender, instance, **kwargs):
+    publish_rows([instance], 'delete')
+
+
+@receiver(bulk_changed)
+def publish_bulk_change(sender, instances, **kwargs):
+    if sender in LIVE_MODELS:
+        publish_rows(instances, 'upsert')
+
+
+for model in LIVE_MODELS:
+    post_save.connect(publish_saved_row, sender=model)
+    post_delete.connect(publish_deleted_row, sender=model)
+
+
+# Models with a user column; any change to one of their rows changes what
+# that user's GET requests return
+VERSIONED_MODELS = (
+    ScheduleItem, ScheduleTemplate, Quiz, QuizAttempt, Assignment, WeeklyGoal, StudyActivity,
+    SubjectPerformance, Exam, UserQuizStats, Document,
+)
+
+
+def bump_version_on_change(sender, instance, **kwargs):
+    """Expire the owner's ETags when one of their rows changes"""
+    bump_user_version_on_commit(instance.user_id)
+
+
+@receiver(bulk_changed)
+def bump_version_on_bulk_change(sender, user_ids, **kwargs):
+    for user_id in user_ids:
+        bump_user_version_on_commit(user_id)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_change, sender=model)
+    post_delete.connect(bump_version_on_change, sender=model)
+
+
+@receiver(post_save, sender=QuizQuestion)
+@receiver(post_delete, sender=QuizQuestion)
+def bump_version_on_question_change(sender, instance, **kwargs):
+    """Questions belong to the quiz's owner"""
+    if QuizQuestion.quiz.is_cached(instance):
+        user_id = instance.quiz.user_id
+    else:
+        # The quiz may already be gone when it is deleted with its questions;
+        # deleting it bumps the owner's version anyway
+        user_id = Quiz.objects.filter(pk=instance.quiz_id).values_list('user_id', flat=True).first()
+    bump_user_version_on_commit(user_id)
+
+
+@receiver(post_save, sender=QuizQuestion)
+@receiver(post_delete, sender=QuizQuestion)
+def invalidate_quiz_caches(sender, instance, **kwargs):
+    """
+    Rebuild the quiz's answer key and question list after a question is edited.
+
+    Covers the API and the admin's QuizQuestionInline alike. The caches are
+    dropped again on commit, in case another request refilled them from the
+    old rows in the meantime.
+    """
+    quiz_id = instance.quiz_id
+    for invalidate in (invalidate_answer_key, invalidate_quiz_questions):
+        invalidate(quiz_id)
+        transaction.on_commit(partial(invalidate, quiz_id))
+
+
+@receiver(post_save, sender=StudyActivity)
+@receiver(post_delete, sender=StudyActivity)
+def invalidate_activity_feed_on_change(sender, instance, **kwargs):
+    """Drop the owner's cached feed; the next read rebuilds it"""
+    invalidate_activity_feed(instance.user_id)
+    transaction.on_commit(partial(invalidate_activity_feed, instance.user_id))
+
+
+@receiver(bulk_changed)
+def invalidate_activity_feed_on_bulk_change(sender, user_ids, **kwargs):
+    if sender is StudyActivity:
+        for user_id in user_ids:
+            invalidate_activity_feed(user_id)
+            transaction.on_commit(partial(invalidate_activity_feed, user_id))
+
+
+@receiver(post_save, sender=ScheduleTemplate)
+@receiver(post_delete, sender=ScheduleTemplate)
+def invalidate_schedule_templates(sender, instance, **kwargs):
+    """Drop the owner's cached templates, and with them every memoized calendar expansion"""
+    invalidate_templates(instance.user_id)
+    transaction.on_commit(partial(invalidate_templates, instance.user_id))
+
+
+STUDY_TIME_FIELDS = {'user_id', 'subject', 'date', 'status'}
+
+
+@receiver(post_init, sender=ScheduleItem)
+def remember_study_time_key(sender, instance, **kwargs):
+    """Remember which study-time total a loaded item counts towards, in case a save moves it"""
+    # Reading a deferred field would cost a query per instance
+    if STUDY_TIME_FIELDS & instance.get_deferred_fields():
+        instance._study_time_key = None
+    else:
+        instance._study_time_key = study_time_key(instance) if instance.status == COUNTED_STATUS else None
+
+
+def changed_study_time_keys(instance):
+    """Totals a saved item counted towards before or counts towards now"""
+    previous = getattr(instance, '_study_time_key', None)
+    current = study_time_key(instance) if instance.status == COUNTED_STATUS else None
+    instance._study_time_key = current
+    return {key for key in (previous, current) if key is not None}
+
+
+@receiver(post_save, sender=ScheduleItem)
+def refresh_study_time_on_save(sender, instance, **kwargs):
+    keys = changed_study_time_keys(instance)
+    if keys:
+        transaction.on_commit(partial(refresh_study_time, keys))
+
+
+@receiver(post_delete, sender=ScheduleItem)
+def refresh_study_time_on_delete(sender, instance, **kwargs):
+    if instance.status == COUNTED_STATUS:
+        transaction.on_commit(partial(refresh_study_time, {study_time_key(instance)}))
+
+
+@receiver(bulk_changed)
+def refresh_study_time_on_bulk_change(sender, instances, **kwargs):
+    if sender is ScheduleItem:
+        keys = set()
+        for instance in instances:
+            keys |= changed_study_time_keys(instance)
+        if keys:
+            transaction.on_commit(partial(refresh_study_time, keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a token as soon as it is deleted anywhere"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Refresh cached username/is_active after a user is edited"""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
@@ -0,0 +1,314 @@
+import hashlib
+import os
+import threading
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+
+
+MAX_PDF_SIZE = 50 * 1024 * 1024
+
+# R2 requires every part but the last to be the same size, and S3 requires at
+# least 5MB. The upload handler holds at most one part in memory.
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_r2_config():
+    """Read R2 settings from the environment; None when credentials are missing"""
+    account_id = os.environ.get('R2_ACCOUNT_ID')
+    access_key = os.environ.get('R2_ACCESS_KEY_ID')
+    secret_key = os.environ.get('R2_SECRET_ACCESS_KEY')
+    if not all([account_id, access_key, secret_key]):
+        return None
+    return {
+        # R2_ENDPOINT_URL points the client at a local S3 stand-in (moto, minio)
+        'endpoint_url': os.environ.get('R2_ENDPOINT_URL') or f'https://{account_id}.r2.cloudflarestorage.com',
+        'access_key': access_key,
+        'secret_key': secret_key,
+        'bucket_name': os.environ.get('R2_BUCKET_NAME', 'study-dashboard-pdfs'),
+        'public_url': os.environ.get('R2_PUBLIC_URL', ''),
+    }
+
+
+def get_r2_client():
+    """
+    Return the process-wide S3 client for R2, creating it on first use.
+
+    boto3 clients are thread-safe and keep their own HTTP connection pool, so
+    one client is shared by every request handled in this process.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+                from botocore.config import Config
+
+                config = get_r2_config()
+                _client = boto3.client(
+                    's3',
+                    endpoint_url=config['endpoint_url'],
+                    aws_access_key_id=config['access_key'],
+                    aws_secret_access_key=config['secret_key'],
+                    config=Config(
+                        signature_version='s3v4',
+                        max_pool_connections=int(os.environ.get('R2_MAX_POOL_CONNECTIONS', 20)),
+                    ),
+                    region_name='auto'
+                )
+    return _client
+
+
+def reset_r2_client():
+    """Drop the cached client, e.g. after the R2 environment changes"""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+# Presigned GET URLs are valid for 7 days and reused from the cache until
+# a day before they expire, then regenerated on the next request.
+PRESIGNED_GET_EXPIRY = 7 * 24 * 60 * 60
+PRESIGNED_GET_REFRESH_MARGIN = 24 * 60 * 60
+
+
+def get_object_url(key, config=None):
+    """Public URL for an object, a presigned GET URL valid for 7 days, or None without R2"""
+    config = config or get_r2_config()
+    if config is None:
+        return None
+    if config['public_url']:
+        return f"{config['public_url']}/{key}"
+    return get_r2_client().generate_presigned_url(
+        'get_object',
+        Params={'Bucket': config['bucket_name'], 'Key': key},
+        ExpiresIn=PRESIGNED_GET_EXPIRY
+    )
+
+
+def get_cached_object_url(key, config=None):
+    """get_object_url, reusing a cached presigned URL that isn't close to expiry"""
+    config = config or get_r2_config()
+    if config is None or config['public_url']:
+        return get_object_url(key, config)
+    cache_key = f'r2-url:{key}'
+    url = cache.get(cache_key)
+    if url is None:
+        url = get_object_url(key, config)
+        cache.set(cache_key, url, PRESIGNED_GET_EXPIRY - PRESIGNED_GET_REFRESH_MARGIN)
+    return url
+
+
+def delete_object(key, config=None):
+    config = config or get_r2_config()
+    get_r2_client().delete_object(Bucket=config['bucket_name'], Key=key)
+    cache.delete(f'r2-url:{key}')
+
+
+def content_key(user_id, sha256):
+    """Content-addressed key: one object per distinct PDF per user"""
+    return f"{user_id}/{sha256}.pdf"
+
+
+def move_object(source_key, dest_key, config=None):
+    """Server-side copy to a new key, then delete the original"""
+    config = config or get_r2_config()
+    client = get_r2_client()
+    client.copy_object(
+        Bucket=config['bucket_name'],
+        Key=dest_key,
+        CopySource={'Bucket': config['bucket_name'], 'Key': source_key},
+        ContentType='application/pdf',
+        MetadataDirective='REPLACE',
+    )
+    client.delete_object(Bucket=config['bucket_name'], Key=source_key)
+
+
+class StoredFile(UploadedFile):
+    """An uploaded file whose bytes already live in R2 under `key`"""
+
+    def __init__(self, name, key, size, content_type, sha256=''):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.key = key
+        self.sha256 = sha256
+
+
+class R2StreamingUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams the `file` field straight into R2.
+
+    Incoming chunks are hashed and collected into MULTIPART_PART_SIZE parts,
+    sent as an S3 multipart upload as soon as each part is full, so the
+    request body is never spooled to memory or disk as a whole. On a rejected
+    or interrupted upload the multipart upload is aborted and `error` explains
+    why.
+
+    Once the SHA-256 is known, `find_duplicate(sha256)` may return an existing
+    object (anything with a `key`); the upload is then dropped and `duplicate`
+    is set. Files smaller than one part have not sent any bytes by then.
+    Otherwise the object ends up at `key_for_hash(sha256)`: small files are
+    put there directly, multipart uploads are written to the provisional `key`
+    and moved server-side.
+    """
+    field_name = 'file'
+
+    def __init__(self, request, key, max_size=MAX_PDF_SIZE, find_duplicate=None, key_for_hash=None):
+        super().__init__(request)
+        self.key = key
+        self.max_size = max_size
+        self.find_duplicate = find_duplicate
+        self.key_for_hash = key_for_hash
+        self.duplicate = None
+        self.error = None
+        self.config = get_r2_config()
+        self.client = get_r2_client()
+        self.upload_id = None
+        self.parts = []
+        self.buffer = bytearray()
+        self.size = 0
+        self.hash = hashlib.sha256()
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if field_name != self.field_name:
+            raise SkipFile()
+        if not file_name.lower().endswith('.pdf'):
+            self.error = 'Only PDF files allowed'
+            raise SkipFile()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.error = 'File too large. Max 50MB'
+            self.abort()
+            raise SkipFile()
+        self.hash.update(raw_data)
+        self.buffer += raw_data
+        while len(self.buffer) >= MULTIPART_PART_SIZE:
+            part, self.buffer = self.buffer[:MULTIPART_PART_SIZE], self.buffer[MULTIPART_PART_SIZE:]
+            self._upload_part(part)
+        return None
+
+    def file_complete(self, file_size):
+        digest = self.hash.hexdigest()
+        if self.find_duplicate is not None:
+            self.duplicate = self.find_duplicate(digest)
+        if self.duplicate is not None:
+            self.abort()
+            return StoredFile(self.file_name, self.duplicate.key, self.size, 'application/pdf', digest)
+
+        bucket = self.config['bucket_name']
+        key = self.key_for_hash(digest) if self.key_for_hash else self.key
+        if self.upload_id is None:
+            self.client.put_object(
+                Bucket=bucket, Key=key, Body=self.buffer, ContentType='application/pdf'
+            )
+        else:
+            if self.buffer:
+                self._upload_part(self.buffer)
+            self.client.complete_multipart_upload(
+                Bucket=bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={'Parts': self.parts}
+            )
+            if key != self.key:
+                move_object(self.key, key, self.config)
+        self.buffer = bytearray()
+        return StoredFile(self.file_name, key, self.size, 'application/pdf', digest)
+
+    def upload_interrupted(self):
+        self.abort()
+
+    def abort(self):
+        """Discard any parts already sent"""
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.config['bucket_name'], Key=self.key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+        self.buffer = bytearray()
+
+    def _upload_part(self, data):
+        if self.upload_id is None:
+            response = self.client.create_multipart_upload(
+                Bucket=self.config['bucket_name'], Key=self.key, ContentType='application/pdf'
+            )
+            self.upload_id = response['UploadId']
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.config['bucket_name'], Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=data
+        )
+        self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+
+# Presigned upload URLs and tickets stay valid for this long
+PRESIGNED_UPLOAD_EXPIRY = 60 * 60
+
+
+def create_presigned_upload(key, size):
+    """
+    Presign a direct-to-R2 upload of `size` bytes to `key`.
+
+    Small files get a single presigned PUT. Larger ones start a multipart
+    upload and get one presigned URL per MULTIPART_PART_SIZE part; the client
+    sends the parts itself and reports their ETags back on completion.
+    """
+    config = get_r2_config()
+    client = get_r2_client()
+    bucket = config['bucket_name']
+
+    if size <= MULTIPART_PART_SIZE:
+        url = client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': bucket, 'Key': key, 'ContentType': 'application/pdf'},
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRY
+        )
+        return {'method': 'PUT', 'url': url, 'upload_id': None, 'parts': []}
+
+    upload_id = client.create_multipart_upload(
+        Bucket=bucket, Key=key, ContentType='application/pdf'
+    )['UploadId']
+    part_count = -(-size // MULTIPART_PART_SIZE)
+    parts = [
+        {
+            'partNumber': number,
+            'url': client.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': number},
+                ExpiresIn=PRESIGNED_UPLOAD_EXPIRY
+            ),
+        }
+        for number in range(1, part_count + 1)
+    ]
+    return {'method': 'PUT', 'url': None, 'upload_id': upload_id, 'parts': parts}
+
+
+def complete_presigned_upload(key, upload_id, parts, max_size=MAX_PDF_SIZE):
+    """
+    Finish a presigned upload and check what actually landed in R2.
+
+    Returns the stored object's size. Raises ValueError, after deleting the
+    object, when it exceeds max_size - a presigned PUT cannot enforce that.
+    """
+    config = get_r2_config()
+    client = get_r2_client()
+    bucket = config['bucket_name']
+
+    if upload_id:
+        client.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': int(part['partNumber']), 'ETag': part['etag']} for part in parts
+            ]}
+        )
+
+    size = client.head_object(Bucket=bucket, Key=key)['ContentLength']
+    if size > max_size:
+        client.delete_object(Bucket=bucket, Key=key)
+        raise ValueError('File too large. Max 50MB')
+    return size
@@ -0,0 +1,167 @@
+"""
+Study-time analytics.
+
+Time studied comes from completed schedule items (end_time - start_time) and
+is kept precomputed: StudyTimeDaily per (user, subject, day), and
+StudyTimeRollup per week (starting Monday) and per month on top of it. The
+signals in api/signals.py refresh the keys a schedule change touches once its
+transaction commits. Each refresh recomputes from the source rows rather than
+applying a delta, so concurrent edits can't leave the totals drifting.
+`manage.py backfill_study_time` rebuilds everything from scratch.
+
+Range queries read one row per subject per day, week or month in the range.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+
+from .conditional import bump_user_version
+from .models import ScheduleItem, StudyTimeDaily, StudyTimeRollup
+
+
+# Schedule items that count as time studied
+COUNTED_STATUS = 'completed'
+
+
+def session_minutes(start_time, end_time):
+    """Length of a session in whole minutes; an end before the start runs past midnight"""
+    start = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+    end = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+    if end < start:
+        end += 24 * 3600
+    return (end - start) // 60
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+# period -> (start of the period containing a day, start of the next period)
+PERIODS = {
+    'day': (lambda day: day, lambda start: start + timedelta(days=1)),
+    'week': (week_start, lambda start: start + timedelta(days=7)),
+    'month': (month_start, next_month),
+}
+ROLLUP_PERIODS = ('week', 'month')
+
+# Periods returned when a query gives no start date, and the longest range
+# (in days) a single query may cover
+DEFAULT_PERIODS = {'day': 7, 'week': 8, 'month': 6}
+MAX_RANGE_DAYS = {'day': 366, 'week': 3 * 366, 'month': 10 * 366}
+
+
+def study_time_key(item):
+    """The StudyTimeDaily row a schedule item counts towards"""
+    return (item.user_id, item.subject, item.date)
+
+
+def store_total(model, lookup, minutes, sessions):
+    """Write one total row, deleting it when nothing counts towards it any more"""
+    rows = model.objects.filter(**lookup)
+    if not sessions:
+        rows.delete()
+        return
+    if rows.update(minutes=minutes, sessions=sessions):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(minutes=minutes, sessions=sessions, **lookup)
+    except IntegrityError:
+        # Created by a concurrent refresh in the meantime
+        rows.update(minutes=minutes, sessions=sessions)
+
+
+def refresh_study_time(keys):
+    """Recompute the daily rows for (user_id, subject, day) keys, then their weeks and months"""
+    keys = {key for key in keys if key[0] is not None}
+    periods = set()
+    for user_id, subject, day in keys:
+        sessions = [
+            session_minutes(start_time, end_time)
+            for start_time, end_time in ScheduleItem.objects.filter(
+                user_id=user_id, subject=subject, date=day, status=COUNTED_STATUS
+            ).values_list('start_time', 'end_time')
+        ]
+        store_total(
+            StudyTimeDaily, {'user_id': user_id, 'subject': subject, 'day': day}, sum(sessions), len(sessions)
+        )
+        for period in ROLLUP_PERIODS:
+            periods.add((user_id, subject, period, PERIODS[period][0](day)))
+
+    for user_id, subject, period, start in periods:
+        totals = StudyTimeDaily.objects.filter(
+            user_id=user_id, subject=subject, day__gte=start, day__lt=PERIODS[period][1](start)
+        ).aggregate(minutes=Sum('minutes'), sessions=Sum('sessions'))
+        store_total(
+            StudyTimeRollup, {'user_id': user_id, 'subject': subject, 'period': period, 'start': start},
+            totals['minutes'] or 0, totals['sessions'] or 0
+        )
+
+    # The rows were written after the schedule change bumped the version, so
+    # bump again or a client could keep the pre-refresh totals under a new ETag
+    for user_id in {user_id for user_id, _, _ in keys}:
+        bump_user_version(user_id)
+
+
+def period_starts(period, first, last):
+    """Starts of every period overlapping [first, last]"""
+    start_of, following = PERIODS[period]
+    start = start_of(first)
+    while start <= last:
+        yield start
+        start = following(start)
+
+
+def default_first_day(period, last):
+    """Start of the DEFAULT_PERIODS[period]th period back from the one containing `last`"""
+    start_of = PERIODS[period][0]
+    start = start_of(last)
+    for _ in range(DEFAULT_PERIODS[period] - 1):
+        start = start_of(start - timedelta(days=1))
+    return start
+
+
+def hours(minutes):
+    return round(minutes / 60, 2)
+
+
+def study_time_range(user_id, period, first, last):
+    """
+    Study time for every day, week or month overlapping [first, last], oldest first.
+
+    Periods without study time are included with zero totals.
+    """
+    if period == 'day':
+        rows = StudyTimeDaily.objects.filter(user_id=user_id, day__range=(first, last)).values_list(
+            'day', 'subject', 'minutes', 'sessions'
+        ).order_by('day', 'subject')
+    else:
+        rows = StudyTimeRollup.objects.filter(
+            user_id=user_id, period=period, start__range=(PERIODS[period][0](first), last)
+        ).values_list('start', 'subject', 'minutes', 'sessions').order_by('start', 'subject')
+
+    by_start = {start: list(group) for start, group in groupby(rows, key=lambda row: row[0])}
+    result = []
+    for start in period_starts(period, first, last):
+        subjects = [
+            {'subject': subject, 'minutes': minutes, 'hours': hours(minutes), 'sessions': sessions}
+            for _, subject, minutes, sessions in by_start.get(start, ())
+        ]
+        total = sum(subject['minutes'] for subject in subjects)
+        result.append({
+            'start': start.isoformat(),
+            'minutes': total,
+            'hours': hours(total),
+            'subjects': subjects,
+        })
+    return result
@@ -0,0 +1,1185 @@
+import hashlib
+import json
+import os
+import time as clock
+from base64 import b64decode, b64encode
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import partial
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import boto3
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.models import Prefetch
+from django.http.multipartparser import MultiPartParser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from .activity_log import activity_feed_key, get_activity_feed
+from .authentication import _local_tokens, get_token_user, token_cache_key
+from .dashboard import DASHBOARD_COLD_QUERY_COUNT, DASHBOARD_QUERY_COUNT, build_dashboard, get_dashboard
+from .events import ActivityEventWriter
+from .management.commands.check_nplusone import Command as CheckNPlusOne
+from .models import (
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt, Assignment, WeeklyGoal, StudyActivity,
+    SubjectPerformance, Exam, QuestionStats, QuizScoreBucket, UserQuizStats, Document, StudyActivityRollup,
+    StudyTimeDaily
+)
+from .read_serializers import (
+    ScheduleItemReadSerializer, QuizReadSerializer, QuizListReadSerializer,
+    AssignmentReadSerializer, WeeklyGoalReadSerializer, StudyActivityReadSerializer,
+    SubjectPerformanceReadSerializer, ExamReadSerializer, DocumentReadSerializer
+)
+from .schedule_calendar import expand_templates
+from .serializers import (
+    ScheduleItemSerializer, QuizSerializer, QuizListSerializer,
+    AssignmentSerializer, WeeklyGoalSerializer, StudyActivitySerializer,
+    SubjectPerformanceSerializer, ExamSerializer, DocumentSerializer
+)
+from .storage import (
+    R2StreamingUploadHandler, complete_presigned_upload, content_key, get_r2_client, reset_r2_client
+)
+from .views import upload_pdf
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto is only needed for the S3 stand-in tests
+    mock_aws = None
+
+
+# Tests get their own cache instead of the shared file cache in settings
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-tests',
+    }
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheIsolatedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+class DashboardQueryTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('dashboard')
+        self.today = timezone.now().date()
+        week_start = self.today - timedelta(days=self.today.weekday())
+        for i in range(3):
+            ScheduleItem.objects.create(
+                user=self.user, subject=f'Subject {i}', start_time='09:00', end_time='10:00', date=self.today
+            )
+            Quiz.objects.create(
+                user=self.user, title=f'Quiz {i}', subject='Maths', topic='Topic',
+                quiz_date=self.today + timedelta(days=i)
+            )
+            Exam.objects.create(
+                user=self.user, title=f'Exam {i}', subject='Physics', exam_date=self.today + timedelta(days=i)
+            )
+            Assignment.objects.create(
+                user=self.user, title=f'Assignment {i}', subject='CS', due_date=self.today,
+                status='completed' if i else 'pending'
+            )
+            WeeklyGoal.objects.create(user=self.user, text=f'Goal {i}', week_start=week_start)
+            StudyActivity.objects.create(user=self.user, text=f'Activity {i}')
+            SubjectPerformance.objects.create(user=self.user, subject=f'Subject {i}', grade='A', percentage=90)
+
+    def test_build_dashboard_query_count(self):
+        # The activity feed is cached separately and costs one query to refill
+        get_activity_feed(self.user.pk)
+        with self.assertNumQueries(DASHBOARD_QUERY_COUNT):
+            payload = build_dashboard(self.user, self.today)
+        self.assertEqual(len(payload['schedule']), 3)
+        self.assertEqual(payload['assignments'], {'completed': 2, 'total': 3, 'remaining': 1})
+        self.assertEqual(payload['upcomingQuiz']['title'], 'Quiz 0')
+        self.assertEqual(len(payload['recentActivities']), 3)
+
+    def test_build_dashboard_query_count_without_rows(self):
+        user = User.objects.create_user('empty')
+        get_activity_feed(user.pk)
+        with self.assertNumQueries(DASHBOARD_QUERY_COUNT):
+            payload = build_dashboard(user, self.today)
+        self.assertIsNone(payload['upcomingQuiz'])
+        self.assertIsNone(payload['upcomingExam'])
+
+    def test_cold_dashboard_query_count(self):
+        # Nothing cached: the activity feed is refilled as well
+        with self.assertNumQueries(DASHBOARD_COLD_QUERY_COUNT):
+            payload = get_dashboard(self.user)
+        self.assertEqual(len(payload['recentActivities']), 3)
+
+    def test_warm_dashboard_runs_no_queries(self):
+        expected = get_dashboard(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard(self.user), expected)
+
+
+class CursorPaginationTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('paginated')
+        self.token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.token.key}'
+        today = timezone.now().date()
+        week_start = today - timedelta(days=today.weekday())
+        # Every goal ties on week_start and most tie on status as well
+        WeeklyGoal.objects.bulk_create([
+            WeeklyGoal(user=self.user, text=f'Goal {i}', week_start=week_start,
+                       status='completed' if i % 4 == 0 else 'pending')
+            for i in range(23)
+        ])
+        Assignment.objects.bulk_create([
+            Assignment(user=self.user, title=f'Assignment {i}', subject='CS', due_date=today + timedelta(days=i % 2))
+            for i in range(17)
+        ])
+
+    def walk(self, url):
+        """Follow next links to the end, then previous links back to the start"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.json()['results']])
+            url = response.json()['next']
+            if url:
+                self.assertNotIn('o=', cursor_query(url))
+        backwards = []
+        url = response.json()['previous']
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('o=', cursor_query(url))
+            backwards.append([row['id'] for row in response.json()['results']])
+            url = response.json()['previous']
+        return pages, backwards
+
+    def assert_walks_in_order(self, url, queryset):
+        pages, backwards = self.walk(url)
+        expected = list(queryset.values_list('id', flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def test_pages_through_ties_without_offsets(self):
+        self.assert_walks_in_order(
+            '/api/goals/?page_size=5', WeeklyGoal.objects.filter(user=self.user).order_by('-week_start', 'status', 'id')
+        )
+        self.assert_walks_in_order(
+            '/api/assignments/?page_size=4', Assignment.objects.filter(user=self.user).order_by('due_date', 'id')
+        )
+
+    def test_malformed_cursor_is_not_found(self):
+        for position in (['1'], ['x', 'y', 'z'], ['2026-01-05', 'pending', 'abc'], [1, 'pending', '1'],
+                         ['2026-01-05', 'pending', ['1']], {'a': 1}):
+            cursor = b64encode(urlencode({'p': json.dumps(position)}).encode()).decode()
+            with self.subTest(position):
+                self.assertEqual(self.client.get(f'/api/goals/?cursor={cursor}').status_code, 404)
+
+    def test_legacy_limit_is_not_capped(self):
+        # The frontend's ?limit= predates pagination and max_page_size
+        WeeklyGoal.objects.bulk_create([
+            WeeklyGoal(user=self.user, text=f'Goal {i}', week_start=timezone.now().date()) for i in range(200)
+        ])
+        response = self.client.get('/api/goals/?current_week=false&limit=300')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 223)
+
+
+def cursor_query(url):
+    """The decoded querystring inside a pagination link's cursor"""
+    return b64decode(parse_qs(urlsplit(url).query)['cursor'][0]).decode()
+
+
+class BulkEndpointTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('bulk')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        self.today = timezone.now().date()
+        self.assignments = [
+            Assignment.objects.create(user=self.user, title=f'Assignment {i}', subject='CS', due_date=self.today)
+            for i in range(2)
+        ]
+
+    def bulk(self, method, data):
+        return getattr(self.client, method)('/api/assignments/bulk/', data, content_type='application/json')
+
+    def item(self, pk, title):
+        return {'id': pk, 'title': title, 'subject': 'CS', 'dueDate': self.today.isoformat()}
+
+    def test_destroy_reports_malformed_ids(self):
+        first, second = self.assignments
+        response = self.bulk('delete', ['abc', [1], {'id': {'x': 1}}, str(first.pk), {'id': second.pk}, 0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.json()],
+                         ['invalid', 'invalid', 'invalid', 'deleted', 'deleted', 'not_found'])
+        self.assertFalse(Assignment.objects.exists())
+
+    def test_update_rejects_malformed_ids(self):
+        first, _ = self.assignments
+        response = self.bulk('put', [self.item('abc', 'A'), self.item([first.pk], 'B'), self.item(first.pk, 'C')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.json()], ['invalid', 'invalid', 'valid'])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'Assignment 0')
+
+    def test_update_rejects_duplicate_ids(self):
+        first, second = self.assignments
+        response = self.bulk('put', [self.item(first.pk, 'A'), self.item(second.pk, 'B'), self.item(first.pk, 'C')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.json()], ['invalid', 'valid', 'invalid'])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'Assignment 0')
+
+    def test_update_applies_valid_items(self):
+        first, second = self.assignments
+        response = self.bulk('put', [self.item(str(first.pk), 'A'), self.item(second.pk, 'B')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(Assignment.objects.values_list('title', flat=True)), ['A', 'B'])
+
+    def test_anonymous_requests_are_rejected(self):
+        first, second = self.assignments
+        del self.client.defaults['HTTP_AUTHORIZATION']
+        for method, data in (('delete', [first.pk, second.pk]), ('put', [self.item(first.pk, 'A')]),
+                             ('post', [self.item(None, 'C')])):
+            self.assertEqual(self.bulk(method, data).status_code, 401)
+        self.assertEqual(sorted(Assignment.objects.values_list('title', flat=True)),
+                         ['Assignment 0', 'Assignment 1'])
+
+    def test_other_users_rows_are_not_found(self):
+        other = Assignment.objects.create(
+            user=User.objects.create_user('other'), title='Theirs', subject='CS', due_date=self.today
+        )
+        response = self.bulk('delete', [other.pk])
+        self.assertEqual([result['status'] for result in response.json()], ['not_found'])
+        self.assertEqual(self.bulk('put', [self.item(other.pk, 'Mine')]).status_code, 400)
+        other.refresh_from_db()
+        self.assertEqual(other.title, 'Theirs')
+
+
+class GradeBatchTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = User.objects.create_user('teacher')
+        self.student = User.objects.create_user('student')
+        self.quiz = Quiz.objects.create(
+            user=self.teacher, title='Quiz', subject='Maths', topic='Topic', quiz_date=timezone.now().date()
+        )
+        self.question = QuizQuestion.objects.create(
+            quiz=self.quiz, question_text='1 + 1?', option_a='1', option_b='2', option_c='3', option_d='4',
+            correct_answer=1
+        )
+        token = Token.objects.create(user=self.teacher)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    def grade(self, submissions):
+        return self.client.post(
+            f'/api/quizzes/{self.quiz.pk}/grade_batch/', {'submissions': submissions}, content_type='application/json'
+        )
+
+    def test_plain_sheets_belong_to_the_caller(self):
+        response = self.grade([{str(self.question.pk): 1}, {'answers': {str(self.question.pk): 0}}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(QuizAttempt.objects.order_by('pk').values_list('user_id', 'score')),
+            [(self.teacher.pk, 1), (self.teacher.pk, 0)]
+        )
+        self.assertEqual(UserQuizStats.objects.get(user=self.teacher, quiz=self.quiz).attempts, 2)
+
+    def test_other_users_sheets_need_staff(self):
+        response = self.grade([{'user': self.student.pk, 'answers': {str(self.question.pk): 1}}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+        User.objects.filter(pk=self.teacher.pk).update(is_staff=True)
+        response = self.grade([{'user': self.student.pk, 'answers': {str(self.question.pk): 1}}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(QuizAttempt.objects.get().user, self.student)
+        self.assertEqual(UserQuizStats.objects.get().user, self.student)
+
+    def test_rejects_unknown_and_malformed_users(self):
+        User.objects.filter(pk=self.teacher.pk).update(is_staff=True)
+        self.assertEqual(self.grade([{'user': 'abc', 'answers': {}}]).status_code, 400)
+        self.assertEqual(self.grade([{'user': self.student.pk + 100, 'answers': {}}]).status_code, 400)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+
+class RebuildQuizAnalyticsTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('rebuild')
+        self.quiz = Quiz.objects.create(
+            user=self.user, title='Quiz', subject='Maths', topic='Topic', quiz_date=timezone.now().date()
+        )
+        self.questions = [
+            QuizQuestion.objects.create(
+                quiz=self.quiz, question_text=f'Question {i}?', option_a='A', option_b='B', option_c='C',
+                option_d='D', correct_answer=i % 4, order=i
+            )
+            for i in range(3)
+        ]
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    def submit(self, answers):
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.pk}/submit/',
+            {'answers': {str(question.pk): answer for question, answer in zip(self.questions, answers)}},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def snapshot(self):
+        return (
+            list(QuizScoreBucket.objects.filter(quiz=self.quiz).values_list('score', 'count')),
+            list(UserQuizStats.objects.filter(quiz=self.quiz).values(
+                'attempts', 'total_percentage', 'rolling_average', 'best_percentage', 'last_percentage'
+            )),
+        )
+
+    def test_rebuild_keeps_recorded_scores_after_questions_change(self):
+        self.submit([0, 1, 2])
+        self.submit([0, 0, 0])
+        self.submit([3, 1, None])
+        before = self.snapshot()
+
+        # Editing the key must not regrade history
+        QuizQuestion.objects.filter(pk=self.questions[0].pk).update(correct_answer=3)
+        self.questions[2].delete()
+        call_command('rebuild_quiz_analytics', stdout=StringIO())
+
+        self.assertEqual(self.snapshot(), before)
+        stats = dict(QuestionStats.objects.values_list('question_id', 'attempts'))
+        correct = dict(QuestionStats.objects.values_list('question_id', 'correct'))
+        self.assertEqual(stats, {self.questions[0].pk: 3, self.questions[1].pk: 3})
+        self.assertEqual(correct, {self.questions[0].pk: 1, self.questions[1].pk: 2})
+
+
+# get_r2_config() reads these; R2_ENDPOINT_URL sends the client to moto
+S3_STAND_IN_ENV = {
+    'R2_ACCOUNT_ID': 'test', 'R2_ACCESS_KEY_ID': 'key', 'R2_SECRET_ACCESS_KEY': 'secret',
+    'R2_BUCKET_NAME': 'pdfs', 'R2_ENDPOINT_URL': 'https://s3.amazonaws.com',
+}
+
+# S3's smallest allowed part, so multipart uploads happen without 8MB bodies
+SMALL_PART_SIZE = 5 * 1024 * 1024
+
+
+def pdf_bytes(size, seed=b'%PDF-1.4 '):
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+@skipUnless(mock_aws, 'moto is not installed')
+class S3StandInTestCase(CacheIsolatedTestCase):
+    """Runs the R2 client against moto's in-memory S3"""
+    bucket = S3_STAND_IN_ENV['R2_BUCKET_NAME']
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (mock.patch.dict(os.environ, S3_STAND_IN_ENV), mock_aws()):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        reset_r2_client()
+        self.addCleanup(reset_r2_client)
+        # R2's region is 'auto', which S3 only accepts for existing buckets
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=self.bucket)
+        self.s3 = get_r2_client()
+
+        self.user = User.objects.create_user('uploader')
+        self.token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.token.key}'
+
+    def stored_keys(self):
+        return sorted(obj['Key'] for obj in self.s3.list_objects_v2(Bucket=self.bucket).get('Contents', []))
+
+    def stored_bytes(self, key):
+        return self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def pending_uploads(self):
+        return self.s3.list_multipart_uploads(Bucket=self.bucket).get('Uploads', [])
+
+    def upload(self, content, name='notes.pdf', subject_id='maths', **extra):
+        return self.client.post(
+            '/api/upload/pdf/', {'file': SimpleUploadedFile(name, content), 'subject_id': subject_id}, **extra
+        )
+
+
+R2_CONFIG = {
+    'endpoint_url': 'https://r2.example', 'access_key': 'key', 'secret_key': 'secret',
+    'bucket_name': 'pdfs', 'public_url': 'https://files.example',
+}
+
+
+@mock.patch('api.views.get_r2_config', return_value=R2_CONFIG)
+@mock.patch('api.views.complete_presigned_upload', return_value=2048)
+@mock.patch('api.views.create_presigned_upload', return_value={
+    'method': 'PUT', 'url': 'https://r2.example/put', 'upload_id': None, 'parts': []
+})
+class PresignedUploadTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('uploader')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    def presign(self, **data):
+        return self.client.post(
+            '/api/upload/pdf/presign/', {'filename': 'notes.pdf', 'size': 2048, **data},
+            content_type='application/json'
+        )
+
+    def complete(self, ticket):
+        return self.client.post('/api/upload/pdf/complete/', {'ticket': ticket}, content_type='application/json')
+
+    def test_keys_are_scoped_to_user_and_subject(self, create, complete, config):
+        self.assertEqual(self.presign(subject_id='maths-101').status_code, 200)
+        key = create.call_args.args[0]
+        self.assertRegex(key, rf'^{self.user.pk}/maths-101/[0-9a-f]{{32}}\.pdf$')
+
+    def test_rejects_unsafe_subject_ids(self, create, complete, config):
+        for subject_id in ['../other', 'a/b', '', 'x' * 101, ['maths']]:
+            self.assertEqual(self.presign(subject_id=subject_id).status_code, 400, subject_id)
+        create.assert_not_called()
+
+    def test_completing_twice_records_one_document(self, create, complete, config):
+        ticket = self.presign().json()['ticket']
+        first = self.complete(ticket)
+        second = self.complete(ticket)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Document.objects.count(), 1)
+        complete.assert_called_once()
+
+    def test_rejects_malformed_presign_bodies(self, create, complete, config):
+        for data in [
+            {'filename': ['notes.pdf']}, {'filename': 'notes.txt'}, {'filename': None},
+            {'size': 'big'}, {'size': [1]}, {'size': 0}, {'size': 50 * 1024 * 1024 + 1},
+            {'sha256': 12}, {'sha256': ['a' * 64]}, {'sha256': 'g' * 64},
+        ]:
+            response = self.presign(**data)
+            self.assertEqual(response.status_code, 400, data)
+            self.assertIn('error', response.json())
+        create.assert_not_called()
+
+    def test_rejects_malformed_parts(self, create, complete, config):
+        create.return_value = {'method': 'PUT', 'url': None, 'upload_id': 'upload', 'parts': []}
+        ticket = self.presign().json()['ticket']
+        for parts in [
+            'parts', [{'etag': '"a"'}], [{'partNumber': 1}], [{'partNumber': 'one', 'etag': '"a"'}],
+            [{'partNumber': 0, 'etag': '"a"'}], [None], [],
+        ]:
+            response = self.client.post(
+                '/api/upload/pdf/complete/', {'ticket': ticket, 'parts': parts}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, parts)
+        self.assertEqual(self.complete(12).status_code, 400)
+        complete.assert_not_called()
+
+
+@mock.patch('api.storage.MULTIPART_PART_SIZE', SMALL_PART_SIZE)
+class PresignedUploadFlowTests(S3StandInTestCase):
+    """presign -> PUT to the presigned URL(s) -> complete, end to end against the S3 stand-in"""
+
+    def presign(self, content, **data):
+        response = self.client.post(
+            '/api/upload/pdf/presign/', {'filename': 'notes.pdf', 'size': len(content), **data},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def send(self, upload, content):
+        """What the browser does with the presign response"""
+        if upload['uploadId'] is None:
+            response = requests.put(upload['url'], data=content, headers={'Content-Type': 'application/pdf'})
+            self.assertEqual(response.status_code, 200)
+            return []
+        parts = []
+        for part in upload['parts']:
+            offset = (part['partNumber'] - 1) * SMALL_PART_SIZE
+            response = requests.put(part['url'], data=content[offset:offset + SMALL_PART_SIZE])
+            self.assertEqual(response.status_code, 200)
+            parts.append({'partNumber': part['partNumber'], 'etag': response.headers['ETag']})
+        return parts
+
+    def complete(self, upload, parts):
+        return self.client.post(
+            '/api/upload/pdf/complete/', {'ticket': upload['ticket'], 'parts': parts},
+            content_type='application/json'
+        )
+
+    def test_single_put(self):
+        content = pdf_bytes(2048)
+        upload = self.presign(content, subject_id='maths')
+        response = self.complete(upload, self.send(upload, content))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['size'], len(content))
+        document = Document.objects.get()
+        self.assertRegex(document.key, rf'^{self.user.pk}/maths/[0-9a-f]{{32}}\.pdf$')
+        self.assertEqual(self.stored_bytes(document.key), content)
+
+    def test_multipart(self):
+        content = pdf_bytes(2 * SMALL_PART_SIZE + 1000)
+        upload = self.presign(content)
+        self.assertEqual(len(upload['parts']), 3)
+        response = self.complete(upload, self.send(upload, content))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_bytes(Document.objects.get().key), content)
+        self.assertEqual(self.pending_uploads(), [])
+
+    def test_oversize_object_is_deleted(self):
+        # The client announced 2KB but PUT more than the limit
+        content = pdf_bytes(4096)
+        upload = self.presign(pdf_bytes(2048))
+        parts = self.send(upload, content)
+        with mock.patch('api.views.complete_presigned_upload', partial(complete_presigned_upload, max_size=3000)):
+            response = self.complete(upload, parts)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'File too large. Max 50MB'})
+        self.assertEqual(self.stored_keys(), [])
+        self.assertFalse(Document.objects.exists())
+
+
+class FailingStream(BytesIO):
+    """A request body that breaks after `fail_after` bytes, like a dropped connection"""
+
+    def __init__(self, data, fail_after):
+        super().__init__(data)
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        remaining = self.fail_after - self.tell()
+        if remaining <= 0:
+            raise OSError('Connection reset by peer')
+        return super().read(remaining if size is None or size < 0 else min(size, remaining))
+
+
+@mock.patch('api.storage.MULTIPART_PART_SIZE', SMALL_PART_SIZE)
+class StreamingUploadTests(S3StandInTestCase):
+    def parse(self, handler, content, name='notes.pdf'):
+        """Feed a multipart body through Django's parser and `handler` only"""
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile(name, content)})
+        return MultiPartParser(request.META, request, [handler]).parse()
+
+    def test_large_file_is_sent_in_parts(self):
+        content = pdf_bytes(2 * SMALL_PART_SIZE + 1000)
+        with mock.patch.object(self.s3, 'upload_part', wraps=self.s3.upload_part) as upload_part:
+            response = self.upload(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(upload_part.call_count, 3)
+        key = content_key(self.user.pk, hashlib.sha256(content).hexdigest())
+        self.assertEqual(Document.objects.get().key, key)
+        # The provisional multipart key was moved to the content-addressed one
+        self.assertEqual(self.stored_keys(), [key])
+        self.assertEqual(self.stored_bytes(key), content)
+        self.assertEqual(self.pending_uploads(), [])
+
+    def test_oversize_file_is_aborted(self):
+        handler = R2StreamingUploadHandler(None, key='uploads/big.pdf', max_size=SMALL_PART_SIZE + 1000)
+        _, files = self.parse(handler, pdf_bytes(2 * SMALL_PART_SIZE))
+        self.assertNotIn('file', files)
+        self.assertEqual(handler.error, 'File too large. Max 50MB')
+        self.assertEqual(self.pending_uploads(), [])
+        self.assertEqual(self.stored_keys(), [])
+
+    def test_non_pdf_is_rejected_unsent(self):
+        response = self.upload(pdf_bytes(1000), name='notes.txt')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Only PDF files allowed'})
+        self.assertEqual(self.stored_keys(), [])
+        self.assertFalse(Document.objects.exists())
+
+    def test_broken_request_aborts_multipart_upload(self):
+        request = RequestFactory().post(
+            '/api/upload/pdf/', {'file': SimpleUploadedFile('notes.pdf', pdf_bytes(3 * SMALL_PART_SIZE))},
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        # Fails after the first part has been sent
+        body = request.environ['wsgi.input'].read()
+        request = WSGIRequest({**request.environ, 'wsgi.input': FailingStream(body, 2 * SMALL_PART_SIZE)})
+        with mock.patch.object(self.s3, 'abort_multipart_upload', wraps=self.s3.abort_multipart_upload) as abort:
+            response = upload_pdf(request)
+        self.assertEqual(response.status_code, 500)
+        abort.assert_called_once()
+        self.assertEqual(self.pending_uploads(), [])
+        self.assertEqual(self.stored_keys(), [])
+        self.assertFalse(Document.objects.exists())
+
+
+class DeduplicationTests(S3StandInTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = pdf_bytes(4096)
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+        self.key = content_key(self.user.pk, self.sha256)
+
+    def test_same_bytes_are_stored_once(self):
+        first = self.upload(self.content, subject_id='maths')
+        with mock.patch.object(self.s3, 'put_object', wraps=self.s3.put_object) as put_object:
+            second = self.upload(self.content, name='copy.pdf', subject_id='physics')
+        self.assertFalse(first.json()['duplicate'])
+        self.assertTrue(second.json()['duplicate'])
+        put_object.assert_not_called()
+        self.assertEqual(self.stored_keys(), [self.key])
+        self.assertEqual(
+            sorted(Document.objects.values_list('subject_id', 'key', 'filename')),
+            [('maths', self.key, 'notes.pdf'), ('physics', self.key, 'copy.pdf')]
+        )
+
+    def test_repeat_in_same_subject_reuses_document(self):
+        first = self.upload(self.content)
+        second = self.upload(self.content)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_known_hash_header_skips_body(self):
+        self.upload(self.content)
+        with mock.patch('api.views.R2StreamingUploadHandler') as handler:
+            response = self.client.post(
+                '/api/upload/pdf/?subject_id=physics&filename=copy.pdf', HTTP_X_CONTENT_SHA256=self.sha256.upper()
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['duplicate'])
+        handler.assert_not_called()
+        self.assertEqual(Document.objects.get(subject_id='physics').key, self.key)
+        self.assertEqual(self.stored_keys(), [self.key])
+
+    def test_unknown_hash_header_uploads_body(self):
+        response = self.upload(self.content, HTTP_X_CONTENT_SHA256='0' * 64)
+        self.assertFalse(response.json()['duplicate'])
+        self.assertEqual(self.stored_keys(), [self.key])
+
+    def test_known_hash_skips_presign(self):
+        self.upload(self.content)
+        response = self.client.post(
+            '/api/upload/pdf/presign/',
+            {'filename': 'copy.pdf', 'size': len(self.content), 'subject_id': 'physics', 'sha256': self.sha256},
+            content_type='application/json'
+        )
+        self.assertTrue(response.json()['duplicate'])
+        self.assertNotIn('ticket', response.json())
+        self.assertEqual(Document.objects.count(), 2)
+
+    def test_shared_object_outlives_one_document(self):
+        first = self.upload(self.content, subject_id='maths').json()['id']
+        second = self.upload(self.content, subject_id='physics').json()['id']
+        self.assertEqual(self.client.delete(f'/api/documents/{first}/').status_code, 204)
+        self.assertEqual(self.stored_keys(), [self.key])
+        self.assertEqual(self.client.delete(f'/api/documents/{second}/').status_code, 204)
+        self.assertEqual(self.stored_keys(), [])
+
+
+class DocumentListTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('reader')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        self.document = Document.objects.create(
+            user=self.user, key=f'{self.user.pk}/{"0" * 64}.pdf', filename='notes.pdf', size=2048, sha256='0' * 64
+        )
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        for name in ('R2_ACCOUNT_ID', 'R2_ACCESS_KEY_ID', 'R2_SECRET_ACCESS_KEY'):
+            os.environ.pop(name, None)
+
+    def test_urls_are_null_without_r2(self):
+        listing = self.client.get('/api/documents/')
+        self.assertEqual(listing.status_code, 200)
+        self.assertEqual([row['url'] for row in listing.json()['results']], [None])
+        for path in (f'/api/documents/{self.document.pk}/', f'/api/documents/{self.document.pk}/url/'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.json()['url'])
+
+
+@mock.patch('api.storage.get_r2_config', return_value=R2_CONFIG)
+class ReadSerializerOutputTests(CacheIsolatedTestCase):
+    """The .values()-based read serializers render byte for byte what the DRF serializers do"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('golden')
+        today = timezone.now().date()
+        now = timezone.now()
+        statuses = ['pending', 'in-progress', 'completed']
+        times = [
+            ('09:30', '10:45:30'),
+            # Overnight sessions end the next day
+            ('22:00', '01:30'),
+            ('23:59:59', '00:00:01'),
+            ('00:00', '23:59'),
+        ]
+        for offset in (-1, 0, 1):
+            for i, (start_time, end_time) in enumerate(times):
+                ScheduleItem.objects.create(
+                    user=self.user, subject=f'Subject {i}', start_time=start_time, end_time=end_time,
+                    status=['upcoming', 'in-progress', 'completed'][i % 3], date=today + timedelta(days=offset)
+                )
+        for i in range(4):
+            quiz = Quiz.objects.create(
+                user=self.user, title=f'Quiz {i}', subject='Maths', topic='Topic', quiz_date=today + timedelta(days=i - 2)
+            )
+            for order in (2, 0, 1):
+                QuizQuestion.objects.create(
+                    quiz=quiz, question_text=f'Question {order}?', option_a='A', option_b='B', option_c='C',
+                    option_d='D', correct_answer=order, explanation='Because' if order else '', order=order
+                )
+        for i, link in enumerate([None, '', 'https://example.com/a']):
+            Assignment.objects.create(
+                user=self.user, title=f'Assignment {i}', subject='CS', due_date=today + timedelta(days=i),
+                status=statuses[i], description='Ünïcode "quoted"' if i else '', link=link
+            )
+            WeeklyGoal.objects.create(
+                user=self.user, text=f'Goal {i}', status=statuses[i], week_start=today - timedelta(days=7 * i)
+            )
+            StudyActivity.objects.create(
+                user=self.user, text=f'Activity {i}', activity_time=now - timedelta(hours=7 * i, microseconds=i * 7)
+            )
+            SubjectPerformance.objects.create(user=self.user, subject=f'Subject {i}', grade='A', percentage=i * 40)
+            Exam.objects.create(
+                user=self.user, title=f'Exam {i}', subject='Physics', exam_date=today + timedelta(days=i - 1)
+            )
+            Document.objects.create(
+                user=self.user, key=f'{self.user.pk}/{i:064x}.pdf', filename=f'notes-{i}.pdf', size=1024 * i,
+                sha256=f'{i:064x}' if i % 2 else ''
+            )
+
+    def serializer_pairs(self):
+        """(label, queryset, DRF serializer, read serializer) for every list endpoint"""
+        user = self.user
+        return [
+            ('schedule', ScheduleItem.objects.filter(user=user), ScheduleItemSerializer, ScheduleItemReadSerializer),
+            ('quizzes (list)', Quiz.objects.filter(user=user), QuizListSerializer, QuizListReadSerializer),
+            ('quizzes (detail)', Quiz.objects.filter(user=user).prefetch_related(
+                Prefetch('questions', queryset=QuizQuestion.objects.order_by('order', 'pk'))
+            ), QuizSerializer, QuizReadSerializer),
+            ('assignments', Assignment.objects.filter(user=user), AssignmentSerializer, AssignmentReadSerializer),
+            ('goals', WeeklyGoal.objects.filter(user=user), WeeklyGoalSerializer, WeeklyGoalReadSerializer),
+            ('activities', StudyActivity.objects.filter(user=user), StudyActivitySerializer,
+             StudyActivityReadSerializer),
+            ('performance', SubjectPerformance.objects.filter(user=user),
+             SubjectPerformanceSerializer, SubjectPerformanceReadSerializer),
+            ('exams', Exam.objects.filter(user=user), ExamSerializer, ExamReadSerializer),
+            ('documents', Document.objects.filter(user=user), DocumentSerializer, DocumentReadSerializer),
+        ]
+
+    def assert_same_output(self):
+        renderer = JSONRenderer()
+        for label, queryset, drf_serializer, read_serializer in self.serializer_pairs():
+            with self.subTest(label, timezone=timezone.get_current_timezone_name()):
+                expected = renderer.render(drf_serializer(queryset.all(), many=True).data)
+                actual = renderer.render(read_serializer.serialize(read_serializer.values(queryset.all())))
+                self.assertEqual(actual, expected)
+
+    def test_matches_drf_output(self, config):
+        self.assert_same_output()
+
+    def test_matches_drf_output_outside_utc(self, config):
+        for name in ('Asia/Kolkata', 'America/New_York'):
+            with timezone.override(name):
+                self.assert_same_output()
+
+
+@override_settings(NPLUSONE_MODE='raise')
+class NPlusOneTests(CacheIsolatedTestCase):
+    """Every router endpoint answers with no query shape repeated past NPLUSONE_THRESHOLD"""
+
+    def test_router_endpoints(self):
+        command = CheckNPlusOne()
+        user = command.seed(settings.NPLUSONE_THRESHOLD + 2)
+        token = Token.objects.create(user=user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        urls = command.api_urls(user)
+        self.assertIn(reverse('quiz-list'), urls)
+        self.assertIn(reverse('scheduleitem-detail', args=[ScheduleItem.objects.filter(user=user)[0].pk]), urls)
+        for url in urls:
+            with self.subTest(url):
+                # A repeated query raises NPlusOneError out of the request
+                self.assertLess(self.client.get(url).status_code, 400)
+
+    # Admin pages link static files, which have no manifest before collectstatic
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_check_nplusone_leaves_no_cached_data(self):
+        # The test runner has already set up the test environment
+        CheckNPlusOne(stdout=StringIO()).check_pages({'rows': None})
+        # SQLite reuses the rolled-back ids
+        user = User.objects.create_user('after-check')
+        self.assertEqual(get_activity_feed(user.pk), [])
+        self.assertEqual(get_dashboard(user)['schedule'], [])
+
+
+class ActivityFeedTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('feed')
+
+    def test_new_activities_show_up(self):
+        self.assertEqual(get_activity_feed(self.user.pk), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            first = StudyActivity.objects.create(user=self.user, text='First')
+            second = StudyActivity.objects.create(user=self.user, text='Second')
+        self.assertEqual([row['id'] for row in get_activity_feed(self.user.pk)], [second.pk, first.pk])
+
+    def test_cached_feed_expires(self):
+        # A refill that raced a write is not kept forever
+        with mock.patch.object(cache, 'set') as set_cache:
+            get_activity_feed(self.user.pk)
+        set_cache.assert_called_once_with(activity_feed_key(self.user.pk), [], settings.ACTIVITY_FEED_TTL)
+
+
+class ActivityCompactionTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('archivist')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        self.other = User.objects.create_user('other')
+        self.old = timezone.now() - timedelta(days=2 * 366)
+        for user, count in ((self.user, 3), (self.other, 2)):
+            for i in range(count):
+                StudyActivity.objects.create(user=user, text=f'Old {i}', activity_time=self.old + timedelta(hours=i))
+        self.recent = StudyActivity.objects.create(user=self.user, text='Recent')
+
+    def test_old_months_are_rolled_up(self):
+        self.assertEqual(len(get_activity_feed(self.user.pk)), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('compact_activities', stdout=StringIO())
+        self.assertEqual(list(StudyActivity.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertEqual(
+            sorted(StudyActivityRollup.objects.values_list('user__username', 'activities')),
+            [('archivist', 3), ('other', 2)]
+        )
+        # The deletes dropped the cached feed
+        self.assertEqual([row['id'] for row in get_activity_feed(self.user.pk)], [self.recent.pk])
+
+        history = self.client.get('/api/activities/history/').json()
+        self.assertEqual([(month['activities'], month['archived']) for month in history], [(1, False), (3, True)])
+
+    def test_history_requires_authentication(self):
+        call_command('compact_activities', stdout=StringIO())
+        del self.client.defaults['HTTP_AUTHORIZATION']
+        self.assertEqual(self.client.get('/api/activities/history/').status_code, 401)
+
+
+class ActivityEventTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('events')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    @mock.patch('api.views.emit_activity')
+    def test_failed_save_emits_nothing(self, emit):
+        item = ScheduleItem.objects.create(
+            user=self.user, subject='Maths', start_time='09:00', end_time='10:00', date=timezone.now().date()
+        )
+        with mock.patch.object(ScheduleItem, 'save', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.client.post(f'/api/schedule/{item.pk}/mark_completed/?date={item.date}')
+        emit.assert_not_called()
+
+        self.client.post(f'/api/schedule/{item.pk}/mark_completed/?date={item.date}')
+        emit.assert_called_once_with(self.user.pk, 'Completed Study Session - Maths')
+
+    def test_synchronous_write_errors_are_logged(self):
+        writer = ActivityEventWriter(batch_size=1, flush_interval=0)
+        activity = StudyActivity(user=self.user, text='Completed Quiz', activity_time=timezone.now())
+        with mock.patch.object(StudyActivity.objects, 'bulk_create', side_effect=OperationalError('gone')):
+            with self.assertLogs('api.events', 'ERROR'):
+                writer.emit(activity)
+        self.assertFalse(StudyActivity.objects.exists())
+
+    def buffered_writer(self, **kwargs):
+        """A buffered writer whose background thread never runs; flush() is called by hand"""
+        patcher = mock.patch('api.events.Thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        writer = ActivityEventWriter(batch_size=100, flush_interval=60, **kwargs)
+        writer.close_retry_delay = 0
+        return writer
+
+    def emit(self, writer, numbers):
+        for i in numbers:
+            writer.emit(StudyActivity(user=self.user, text=f'Event {i}', activity_time=timezone.now()))
+
+    def test_buffer_drops_oldest_events_past_the_limit(self):
+        writer = self.buffered_writer(max_pending=3)
+        self.emit(writer, range(2))
+        with mock.patch.object(StudyActivity.objects, 'bulk_create', side_effect=OperationalError('gone')):
+            with self.assertLogs('api.events', 'ERROR'):
+                self.assertEqual(writer.flush(), 0)
+        self.emit(writer, range(2, 5))
+        with self.assertLogs('api.events', 'ERROR') as logs:
+            self.assertEqual(writer.flush(), 3)
+        self.assertIn('Dropped 2 activity events', logs.output[0])
+        self.assertEqual(sorted(StudyActivity.objects.values_list('text', flat=True)), ['Event 2', 'Event 3', 'Event 4'])
+
+    def test_close_retries_then_reports_lost_events(self):
+        writer = self.buffered_writer()
+        self.emit(writer, range(2))
+        with mock.patch.object(StudyActivity.objects, 'bulk_create', side_effect=OperationalError('gone')) as create:
+            with self.assertLogs('api.events', 'ERROR') as logs:
+                writer.close()
+        self.assertEqual(create.call_count, writer.close_attempts)
+        self.assertIn('Lost 2 activity events at shutdown', logs.output[-1])
+
+    def test_close_writes_once_the_database_is_back(self):
+        writer = self.buffered_writer()
+        self.emit(writer, range(2))
+        bulk_create = StudyActivity.objects.bulk_create
+        errors = [OperationalError('locked')]
+
+        def flaky_bulk_create(batch):
+            if errors:
+                raise errors.pop()
+            return bulk_create(batch)
+
+        with mock.patch.object(StudyActivity.objects, 'bulk_create', side_effect=flaky_bulk_create):
+            with self.assertLogs('api.events', 'ERROR') as logs:
+                writer.close()
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(StudyActivity.objects.count(), 2)
+
+
+class ScheduleStatusTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('clock')
+        self.day = timezone.now().date()
+        self.item = ScheduleItem.objects.create(
+            user=self.user, subject='Maths', start_time='09:00:45', end_time='10:45:30', date=self.day
+        )
+
+    def statuses(self, hour, minute, second):
+        """(DRF, read serializer, stored after advancing) statuses with the clock at hour:minute:second"""
+        now = datetime.combine(self.day, time(hour, minute, second), tzinfo=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            queryset = ScheduleItem.objects.filter(pk=self.item.pk)
+            drf = ScheduleItemSerializer(queryset.get()).data['status']
+            read = ScheduleItemReadSerializer.serialize(ScheduleItemReadSerializer.values(queryset))[0]['status']
+            call_command('advance_schedule_status', stdout=StringIO())
+            return drf, read, queryset.get().status
+
+    def test_times_are_compared_to_the_minute(self):
+        self.assertEqual(self.statuses(8, 59, 59), ('upcoming', 'upcoming', 'upcoming'))
+        # 09:00:45 shows as 09:00, so the session has started at 09:00:10
+        self.assertEqual(self.statuses(9, 0, 10), ('in-progress', 'in-progress', 'in-progress'))
+        self.assertEqual(self.statuses(10, 44, 59), ('in-progress', 'in-progress', 'in-progress'))
+        # 10:45:30 shows as 10:45
+        self.assertEqual(self.statuses(10, 45, 10), ('completed', 'completed', 'completed'))
+
+
+class ScheduleCalendarTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('calendar')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        self.today = timezone.now().date()
+        self.monday = self.today - timedelta(days=self.today.weekday())
+        self.template = ScheduleTemplate.objects.create(
+            user=self.user, subject='Maths', weekday=self.today.weekday(), start_time='09:00', end_time='10:00',
+            starts_on=self.today - timedelta(days=7), ends_on=self.today + timedelta(days=14)
+        )
+
+    def calendar(self, first, last, hour=12):
+        now = datetime.combine(self.today, time(hour, 0), tzinfo=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            response = self.client.get(f'/api/schedule/calendar/?from={first}&to={last}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def occurrences(self, days):
+        return [(day['date'], item['subject'], item['startTime'], item['templateId'])
+                for day in days for item in day['items']]
+
+    def test_range_expansion(self):
+        first, last = self.monday - timedelta(days=14), self.monday + timedelta(days=27)
+        days = self.calendar(first, last)
+        self.assertEqual([day['date'] for day in days], [
+            (first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)
+        ])
+        # Weekly from starts_on to ends_on, and nothing outside them
+        self.assertEqual(self.occurrences(days), [
+            ((self.today + timedelta(days=7 * week)).isoformat(), 'Maths', '09:00', self.template.pk)
+            for week in (-1, 0, 1, 2)
+        ])
+
+    def test_item_in_the_same_slot_replaces_the_occurrence(self):
+        item = ScheduleItem.objects.create(
+            user=self.user, subject='Maths', start_time='09:00', end_time='10:00', date=self.today, status='completed'
+        )
+        days = self.calendar(self.today, self.today)
+        self.assertEqual([(entry['id'], entry['status']) for entry in days[0]['items']], [(item.pk, 'completed')])
+
+    def test_editing_a_template_refreshes_memoized_expansions(self):
+        first, last = self.monday, self.monday + timedelta(days=6)
+        with mock.patch('api.schedule_calendar.expand_templates', wraps=expand_templates) as expand:
+            self.calendar(first, last)
+            self.calendar(first, last)
+            self.assertEqual(expand.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/schedule-templates/{self.template.pk}/', {'startTime': '08:00'},
+                    content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 200)
+            days = self.calendar(first, last)
+            self.assertEqual(expand.call_count, 2)
+        self.assertEqual(self.occurrences(days), [(self.today.isoformat(), 'Maths', '08:00', self.template.pk)])
+
+    def test_occurrences_follow_the_clock(self):
+        ScheduleTemplate.objects.create(
+            user=self.user, subject='Physics', weekday=self.today.weekday(), start_time='11:00', end_time='13:00',
+            starts_on=self.today - timedelta(days=7)
+        )
+        first, last = self.today - timedelta(days=7), self.today + timedelta(days=7)
+
+        def statuses(hour):
+            return [(day['date'], item['subject'], item['status'])
+                    for day in self.calendar(first, last, hour) for item in day['items']]
+
+        today, last_week, next_week = (
+            (self.today + timedelta(days=offset)).isoformat() for offset in (0, -7, 7)
+        )
+        # The second read is served from the memoized expansion
+        for hour, maths, physics in ((8, 'upcoming', 'upcoming'), (12, 'completed', 'in-progress')):
+            self.assertEqual(statuses(hour), [
+                (last_week, 'Maths', 'completed'), (last_week, 'Physics', 'completed'),
+                (today, 'Maths', maths), (today, 'Physics', physics),
+                (next_week, 'Maths', 'upcoming'), (next_week, 'Physics', 'upcoming'),
+            ])
+
+    def test_calendar_requires_authentication(self):
+        ScheduleItem.objects.create(user=self.user, subject='Maths', start_time='09:00', end_time='10:00')
+        del self.client.defaults['HTTP_AUTHORIZATION']
+        self.assertEqual(self.client.get('/api/schedule/calendar/').status_code, 401)
+
+
+class AdvanceScheduleStatusTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('planner')
+        self.today = timezone.now().date()
+        self.now = datetime.combine(self.today, time(12, 0), tzinfo=dt_timezone.utc)
+
+    def item(self, days_ago, start_time, end_time, status='upcoming'):
+        return ScheduleItem.objects.create(
+            user=self.user, subject='Maths', start_time=start_time, end_time=end_time, status=status,
+            date=self.today - timedelta(days=days_ago)
+        )
+
+    def advance(self):
+        output = StringIO()
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('advance_schedule_status', stdout=output)
+        return output.getvalue()
+
+    def test_transitions(self):
+        items = {
+            'ended today': self.item(0, '09:00', '10:00'),
+            'running': self.item(0, '11:30', '13:00'),
+            'later': self.item(0, '14:00', '15:00'),
+            'overnight, running': self.item(1, '22:00', '13:00', 'in-progress'),
+            'overnight, ended': self.item(1, '23:00', '01:00'),
+            'yesterday': self.item(1, '09:00', '10:00'),
+        }
+        self.assertIn('3 completed, 1 in-progress', self.advance())
+        self.assertEqual(
+            {name: ScheduleItem.objects.get(pk=item.pk).status for name, item in items.items()},
+            {
+                'ended today': 'completed', 'running': 'in-progress', 'later': 'upcoming',
+                'overnight, running': 'in-progress', 'overnight, ended': 'completed', 'yesterday': 'completed',
+            }
+        )
+        self.assertIn('0 completed, 0 in-progress', self.advance())
+
+    @override_settings(SCHEDULE_AUTO_ADVANCE_DAYS=2)
+    def test_old_items_are_left_alone(self):
+        recent = self.item(2, '09:00', '10:00')
+        old = self.item(3, '09:00', '10:00')
+        self.advance()
+        self.assertEqual(ScheduleItem.objects.get(pk=recent.pk).status, 'completed')
+        self.assertEqual(ScheduleItem.objects.get(pk=old.pk).status, 'upcoming')
+        # Responses agree with what is stored, and only the recent session counts as study time
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            self.assertEqual(ScheduleItemSerializer(old).data['status'], 'upcoming')
+        self.assertEqual(list(StudyTimeDaily.objects.values_list('day', 'minutes')), [(recent.date, 60)])
+
+
+class TokenCacheTests(CacheIsolatedTestCase):
+    url = '/api/quiz-questions/'
+
+    def setUp(self):
+        super().setUp()
+        _local_tokens.clear()
+        self.addCleanup(_local_tokens.clear)
+        self.user = User.objects.create_user('token')
+        self.token = Token.objects.create(user=self.user)
+
+    def get(self, key):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {key}').status_code
+
+    def test_cached_token_skips_the_database(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        user = get_token_user(self.token.key)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_token_user(self.token.key).pk, user.pk)
+
+    def test_deleted_token_is_rejected_at_once(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        self.token.delete()
+        self.assertEqual(self.get(self.token.key), 401)
+
+    def test_rotated_token_is_rejected_at_once(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        self.token.delete()
+        rotated = Token.objects.create(user=self.user)
+        self.assertEqual(self.get(self.token.key), 401)
+        self.assertEqual(self.get(rotated.key), 200)
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(self.token.key), 401)
+
+    def test_other_processes_drop_the_token_within_the_local_ttl(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        # Deleted by another worker: the shared cache entry and the row are
+        # gone, but this process still holds its own copy
+        Token.objects.filter(key=self.token.key).delete()
+        _local_tokens.set(self.token.key, (self.user.pk, self.user.username, True))
+        self.assertEqual(self.get(self.token.key), 200)
+
+        later = clock.monotonic() + settings.TOKEN_CACHE_LOCAL_TTL + 1
+        with mock.patch('api.authentication.time.monotonic', return_value=later):
+            self.assertEqual(self.get(self.token.key), 401)
+
+    def test_other_processes_see_a_deactivation_within_the_local_ttl(self):
+        self.assertEqual(self.get(self.token.key), 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.delete(token_cache_key(self.token.key))
+        self.assertEqual(self.get(self.token.key), 200)
+
+        later = clock.monotonic() + settings.TOKEN_CACHE_LOCAL_TTL + 1
+        with mock.patch('api.authentication.time.monotonic', return_value=later):
+            self.assertEqual(self.get(self.token.key), 401)
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .metrics import metrics_view
 
 router = DefaultRouter()
 router.register(r'schedule', views.ScheduleItemViewSet)
+router.register(r'schedule-templates', views.ScheduleTemplateViewSet)
 router.register(r'quizzes', views.QuizViewSet)
 router.register(r'quiz-questions', views.QuizQuestionViewSet)
 router.register(r'assignments', views.AssignmentViewSet)
@@ -11,14 +14,31 @@ router.register(r'goals', views.WeeklyGoalViewSet)
 router.register(r'activities', views.StudyActivityViewSet)
 router.register(r'performance', views.SubjectPerformanceViewSet)
 router.register(r'exams', views.ExamViewSet)
+router.register(r'documents', views.DocumentViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', views.dashboard_overview, name='dashboard-overview'),
+    # Study-time analytics
+    path('study-time/daily/', views.study_time, {'period': 'day'}, name='study-time-daily'),
+    path('study-time/weekly/', views.study_time, {'period': 'week'}, name='study-time-weekly'),
+    path('study-time/monthly/', views.study_time, {'period': 'month'}, name='study-time-monthly'),
     # Auth endpoints
     path('auth/login/', views.login_view, name='auth-login'),
     path('auth/verify/', views.verify_token, name='auth-verify'),
     path('auth/logout/', views.logout_view, name='auth-logout'),
     # File upload
     path('upload/pdf/', views.upload_pdf, name='upload-pdf'),
+    path('upload/pdf/presign/', views.presign_pdf_upload, name='upload-pdf-presign'),
+    path('upload/pdf/complete/', views.complete_pdf_upload, name='upload-pdf-complete'),
+    # Prometheus scrape endpoint
+    path('metrics/', metrics_view, name='metrics'),
 ]
+
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    # Long-lived streams need an ASGI server; under WSGI each would pin a worker
+    urlpatterns.append(
+        path('dashboard/stream/', async_views.dashboard_stream, name='dashboard-stream')
+    )
@@ -1,36 +1,72 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, renderer_classes
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import datetime, timedelta
+from django.views.decorators.http import etag
+from collections import Counter
+from datetime import date, datetime, timedelta
+import uuid
 
 from .models import (
-    ScheduleItem, Quiz, QuizQuestion, QuizAttempt,
-    Assignment, WeeklyGoal, StudyActivity, SubjectPerformance, Exam
+    ScheduleItem, ScheduleTemplate, Quiz, QuizQuestion, QuizAttempt,
+    Assignment, WeeklyGoal, StudyActivity, StudyActivityRollup, SubjectPerformance, Exam,
+    UserQuizStats, Document
 )
 from .serializers import (
-    ScheduleItemSerializer, QuizSerializer, QuizListSerializer,
+    ScheduleItemSerializer, ScheduleTemplateSerializer, QuizSerializer, QuizListSerializer,
     QuizQuestionSerializer, QuizAttemptSerializer,
     AssignmentSerializer, WeeklyGoalSerializer, StudyActivitySerializer,
-    SubjectPerformanceSerializer, ExamSerializer
+    SubjectPerformanceSerializer, ExamSerializer,
+    QuestionAnalyticsSerializer, QuizScoreBucketSerializer, UserQuizStatsSerializer,
+    DocumentSerializer, StudyActivityMonthSerializer, PresignUploadSerializer, CompleteUploadSerializer
 )
+from .activity_log import get_activity_feed
+from .analytics import record_grades
+from .authentication import (
+    CachedTokenAuthentication, get_token_key, get_token_user, invalidate_token
+)
+from .conditional import ConditionalGetMixin, bump_user_version_on_commit, user_etag
+from .dashboard import get_dashboard
+from .events import emit_activity
+from .grading import get_answer_key
+from .metrics import stage
+from .pagination import ModelCursorPagination
+from .read_serializers import (
+    ScheduleItemReadSerializer, QuizReadSerializer, QuizListReadSerializer,
+    AssignmentReadSerializer, WeeklyGoalReadSerializer, StudyActivityReadSerializer,
+    SubjectPerformanceReadSerializer, ExamReadSerializer, DocumentReadSerializer
+)
+from .renderers import API_RENDERER_CLASSES
+from .schedule_calendar import calendar_days
+from .schedule_status import STATUS_INTERVAL
+from .signals import bulk_changed
+from .storage import (
+    MULTIPART_PART_SIZE, PRESIGNED_UPLOAD_EXPIRY, R2StreamingUploadHandler,
+    complete_presigned_upload, content_key, create_presigned_upload, delete_object,
+    get_cached_object_url, get_r2_config
+)
+from .study_time import MAX_RANGE_DAYS, default_first_day, study_time_range
+
+
+UPLOAD_TICKET_SALT = 'api.upload-pdf'
 
 
 # Helper to get user from token
 def get_user_from_request(request):
     """Extract user from authorization header"""
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-    if auth_header.startswith('Token '):
-        token_key = auth_header.split(' ')[1]
-        try:
-            token = Token.objects.get(key=token_key)
-            return token.user
-        except Token.DoesNotExist:
-            pass
+    token_key = get_token_key(request)
+    if token_key:
+        return get_token_user(token_key)
     return None
 
 
@@ -60,15 +96,9 @@ def login_view(request):
 @api_view(['POST'])
 def verify_token(request):
     """Verify if the token is valid"""
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-    
-    if auth_header.startswith('Token '):
-        token_key = auth_header.split(' ')[1]
-        try:
-            token = Token.objects.get(key=token_key)
-            return Response({'valid': True, 'username': token.user.username})
-        except Token.DoesNotExist:
-            pass
+    user = get_user_from_request(request)
+    if user:
+        return Response({'valid': True, 'username': user.username})
     
     return Response({'valid': False}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -76,27 +106,78 @@ def verify_token(request):
 @api_view(['POST'])
 def logout_view(request):
     """Logout endpoint that deletes the token"""
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    token_key = get_token_key(request)
     
-    if auth_header.startswith('Token '):
-        token_key = auth_header.split(' ')[1]
-        try:
-            token = Token.objects.get(key=token_key)
-            token.delete()
-        except Token.DoesNotExist:
-            pass
+    if token_key:
+        Token.objects.filter(key=token_key).delete()
+        invalidate_token(token_key)
     
     return Response({'message': 'Logged out successfully'})
 
 
+def parse_date_param(request, name, default):
+    """A YYYY-MM-DD query parameter as a date; a malformed value is a 400"""
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Expected a date (YYYY-MM-DD)'})
+
+
+def parse_bulk_id(value):
+    """A primary key from a bulk request body as an int, or None if it isn't one"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+
 # Base ViewSet with user filtering
-class UserFilteredViewSet(viewsets.ModelViewSet):
+class UserFilteredViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Base ViewSet that filters by authenticated user"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []  # Allow any - we'll handle user filtering manually
+    pagination_class = ModelCursorPagination
+    renderer_classes = API_RENDERER_CLASSES
+    # Optional ValuesSerializer used instead of serializer_class for lists
+    read_serializer_class = None
     
     def get_queryset(self):
         """Filter queryset to only show user's data if authenticated"""
+        return self.get_owned_queryset()
+    
+    def list(self, request, *args, **kwargs):
+        if self.read_serializer_class is None:
+            with stage('serialize'):
+                return super().list(request, *args, **kwargs)
+        
+        rows = self.read_serializer_class.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with stage('serialize'):
+            if page is not None:
+                return self.get_paginated_response(self.read_serializer_class.serialize(page))
+            return Response(self.read_serializer_class.serialize(rows))
+    
+    def retrieve(self, request, *args, **kwargs):
+        with stage('serialize'):
+            return super().retrieve(request, *args, **kwargs)
+    
+    def read_response(self, queryset):
+        """Response listing every row of queryset through the read serializer"""
+        serializer = self.read_serializer_class
+        with stage('serialize'):
+            return Response(serializer.serialize(serializer.values(queryset)))
+    
+    def get_owned_queryset(self):
+        """The user's rows, without the per-view default filters"""
         queryset = super().get_queryset()
         # Filter by user if authenticated
         if self.request.user and self.request.user.is_authenticated:
@@ -117,10 +198,153 @@ class UserFilteredViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ScheduleItemViewSet(UserFilteredViewSet):
+class BulkMixin:
+    """
+    Adds a /bulk/ endpoint to a UserFilteredViewSet.
+
+    POST creates, PUT updates and DELETE removes a list of rows. Every item is
+    validated through the view's serializer before anything is written; if any
+    item fails, nothing is saved and the per-item errors are returned. Writes
+    happen in one transaction with a single bulk_create/bulk_update.
+    
+    Unlike the rest of the viewset, bulk requests must be authenticated:
+    they only ever touch the caller's own rows.
+    """
+    bulk_max_items = 500
+    
+    @action(detail=False, methods=['post', 'put', 'delete'], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Expected a list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'error': f'At most {self.bulk_max_items} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if request.method == 'POST':
+            return self.bulk_create(items)
+        if request.method == 'PUT':
+            return self.bulk_update(items)
+        return self.bulk_destroy(items)
+    
+    def get_bulk_queryset(self):
+        """The caller's rows, filtered explicitly rather than through get_owned_queryset's fallback"""
+        return self.get_queryset().model.objects.filter(user=self.request.user)
+    
+    def validate_bulk(self, items, instances=None, id_errors=None):
+        """
+        Validate every item, against its existing instance when updating.
+        
+        id_errors maps the index of an item whose id can't be used to the
+        reason. Returns (validated_data list, per-item results, whether any
+        item failed).
+        """
+        validated, results, failed = [], [], False
+        for index, item in enumerate(items):
+            instance = instances[index] if instances is not None else None
+            if not isinstance(item, dict):
+                results.append({'index': index, 'status': 'invalid', 'errors': {'non_field_errors': ['Expected an object']}})
+                failed = True
+                continue
+            if id_errors and index in id_errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': {'id': [id_errors[index]]}})
+                failed = True
+                continue
+            if instances is not None and instance is None:
+                results.append({'index': index, 'status': 'not_found'})
+                failed = True
+                continue
+            serializer = self.get_serializer(instance, data=item)
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+                results.append({'index': index, 'status': 'valid'})
+            else:
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+                failed = True
+        return validated, results, failed
+    
+    def bulk_create(self, items):
+        model = self.get_queryset().model
+        validated, results, failed = self.validate_bulk(items)
+        if failed:
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+        
+        objs = [model(user=self.request.user, **attrs) for attrs in validated]
+        with transaction.atomic():
+            objs = model.objects.bulk_create(objs)
+        bulk_changed.send(sender=model, user_ids={obj.user_id for obj in objs}, instances=objs)
+        
+        return Response([
+            {'index': index, 'status': 'created', 'data': self.get_serializer(obj).data}
+            for index, obj in enumerate(objs)
+        ], status=status.HTTP_201_CREATED)
+    
+    def bulk_update(self, items):
+        model = self.get_queryset().model
+        ids = [parse_bulk_id(item.get('id')) if isinstance(item, dict) else None for item in items]
+        counts = Counter(ids)
+        id_errors = {}
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            if not isinstance(item, dict):
+                continue
+            if pk is None:
+                id_errors[index] = 'A valid integer is required.'
+            elif counts[pk] > 1:
+                id_errors[index] = 'Each id may only appear once.'
+        existing = self.get_bulk_queryset().in_bulk({pk for pk in ids if pk is not None})
+        instances = [existing.get(pk) for pk in ids]
+        validated, results, failed = self.validate_bulk(items, instances, id_errors)
+        if failed:
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+        
+        fields = set()
+        for obj, attrs in zip(instances, validated):
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            fields.update(attrs)
+        # bulk_update skips save(), so auto_now fields are stamped by hand
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for obj in instances:
+                    setattr(obj, field.attname, now)
+                fields.add(field.name)
+        
+        with transaction.atomic():
+            model.objects.bulk_update(instances, sorted(fields))
+        bulk_changed.send(sender=model, user_ids={obj.user_id for obj in instances}, instances=instances)
+        
+        return Response([
+            {'index': index, 'status': 'updated', 'data': self.get_serializer(obj).data}
+            for index, obj in enumerate(instances)
+        ])
+    
+    def bulk_destroy(self, items):
+        raw_ids = [item.get('id') if isinstance(item, dict) else item for item in items]
+        ids = [parse_bulk_id(pk) for pk in raw_ids]
+        with transaction.atomic():
+            queryset = self.get_bulk_queryset().filter(pk__in={pk for pk in ids if pk is not None})
+            found = set(queryset.values_list('pk', flat=True))
+            queryset.delete()
+        
+        return Response([
+            {'index': index, 'id': raw, 'status': 'invalid'} if pk is None else
+            {'index': index, 'id': pk, 'status': 'deleted' if pk in found else 'not_found'}
+            for index, (raw, pk) in enumerate(zip(raw_ids, ids))
+        ])
+
+
+class ScheduleItemViewSet(BulkMixin, UserFilteredViewSet):
     """ViewSet for managing schedule items"""
     queryset = ScheduleItem.objects.all()
     serializer_class = ScheduleItemSerializer
+    read_serializer_class = ScheduleItemReadSerializer
+    # Lists are always filtered to a single date
+    cursor_ordering = ['start_time']
+    calendar_max_days = 92
+    etag_interval = STATUS_INTERVAL
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -138,72 +362,202 @@ class ScheduleItemViewSet(UserFilteredViewSet):
     def today(self, request):
         """Get today's schedule"""
         today = timezone.now().date()
-        items = self.get_queryset().filter(date=today)
-        serializer = self.get_serializer(items, many=True)
-        return Response(serializer.data)
+        return self.read_response(self.get_queryset().filter(date=today))
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def calendar(self, request):
+        """
+        Items for every day from ?from= to ?to= (inclusive, default this week),
+        including occurrences of the user's recurring templates
+        """
+        today = timezone.now().date()
+        first = parse_date_param(request, 'from', today - timedelta(days=today.weekday()))
+        last = parse_date_param(request, 'to', first + timedelta(days=6))
+        if first > last:
+            return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+        if (last - first).days >= self.calendar_max_days:
+            return Response(
+                {'error': f'At most {self.calendar_max_days} days per request'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        items = ScheduleItem.objects.filter(user=request.user)
+        with stage('serialize'):
+            return Response(calendar_days(items, request.user.pk, first, last))
     
     @action(detail=True, methods=['post'])
     def mark_completed(self, request, pk=None):
         """Mark a schedule item as completed"""
         item = self.get_object()
+        changed = item.status != 'completed'
         item.status = 'completed'
         item.save()
+        if changed:
+            emit_activity(item.user_id, f'Completed Study Session - {item.subject}')
         serializer = self.get_serializer(item)
         return Response(serializer.data)
 
 
+class ScheduleTemplateViewSet(UserFilteredViewSet):
+    """ViewSet for managing weekly recurring schedule slots"""
+    queryset = ScheduleTemplate.objects.all()
+    serializer_class = ScheduleTemplateSerializer
+
+
 class QuizViewSet(UserFilteredViewSet):
     """ViewSet for managing quizzes"""
     queryset = Quiz.objects.all()
+    read_serializer_class = QuizListReadSerializer
+    grade_batch_max = 1000
     
     def get_serializer_class(self):
         if self.action == 'list':
             return QuizListSerializer
         return QuizSerializer
     
+    def retrieve(self, request, *args, **kwargs):
+        queryset = QuizReadSerializer.values(self.filter_queryset(self.get_queryset()))
+        quiz = get_object_or_404(queryset, pk=kwargs['pk'])
+        with stage('serialize'):
+            return Response(QuizReadSerializer.serialize([quiz])[0])
+    
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming quizzes"""
         today = timezone.now().date()
-        quizzes = self.get_queryset().filter(quiz_date__gte=today)
-        serializer = QuizListSerializer(quizzes, many=True)
-        return Response(serializer.data)
+        return self.read_response(self.get_queryset().filter(quiz_date__gte=today))
     
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """Submit quiz answers and calculate score"""
         quiz = self.get_object()
         answers = request.data.get('answers', {})
+        if not isinstance(answers, dict):
+            return Response({'error': 'answers must be an object'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate score
-        score = 0
-        questions = quiz.questions.all()
-        total = questions.count()
-        
-        for question in questions:
-            user_answer = answers.get(str(question.id))
-            if user_answer is not None and int(user_answer) == question.correct_answer:
-                score += 1
+        # Calculate score against the cached answer key
+        key = get_answer_key(quiz.pk)
+        grade = key.grade(answers)
         
         # Save attempt with user
         attempt = QuizAttempt.objects.create(
-            user=request.user,
+            user=request.user if request.user.is_authenticated else None,
             quiz=quiz,
-            score=score,
-            total_questions=total,
+            score=grade.score,
+            total_questions=grade.total,
             answers=answers
         )
+        record_grades(quiz.pk, key, [(attempt.user_id, grade)])
+        emit_activity(attempt.user_id, f'Completed Quiz - {quiz.title} ({grade.score}/{grade.total})')
+        # The quiz-wide analytics tables are updated without signals
+        bump_user_version_on_commit(quiz.user_id)
         
         serializer = QuizAttemptSerializer(attempt)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def grade_batch(self, request, pk=None):
+        """
+        Grade many answer sheets at once, e.g. a class's offline submissions.
+        
+        A sheet is either an answers object, recorded for the caller, or
+        {"user": <id>, "answers": {...}}. Only staff may grade sheets for
+        other users.
+        """
+        quiz = self.get_object()
+        submissions = request.data.get('submissions')
+        if not isinstance(submissions, list) or not all(isinstance(s, dict) for s in submissions):
+            return Response({'error': 'submissions must be a list of answer objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(submissions) > self.grade_batch_max:
+            return Response(
+                {'error': f'At most {self.grade_batch_max} submissions per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        caller_id = request.user.pk if request.user.is_authenticated else None
+        sheets = []
+        for sheet in submissions:
+            user_id, answers = caller_id, sheet
+            if 'answers' in sheet:
+                answers = sheet['answers']
+                if not isinstance(answers, dict):
+                    return Response({'error': 'answers must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+                if 'user' in sheet:
+                    user_id = parse_bulk_id(sheet['user'])
+                    if user_id is None:
+                        return Response({'error': 'user must be a user id'}, status=status.HTTP_400_BAD_REQUEST)
+            sheets.append((user_id, answers))
+        
+        others = {user_id for user_id, _ in sheets if user_id != caller_id}
+        if others:
+            if not request.user.is_staff:
+                return Response(
+                    {'error': 'Only staff can grade answer sheets for other users'}, status=status.HTTP_403_FORBIDDEN
+                )
+            if User.objects.filter(pk__in=others).count() != len(others):
+                return Response({'error': 'Unknown user in submissions'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        key = get_answer_key(quiz.pk)
+        grades = [key.grade(answers) for _, answers in sheets]
+        attempts = QuizAttempt.objects.bulk_create([
+            QuizAttempt(
+                user_id=user_id,
+                quiz=quiz,
+                score=grade.score,
+                total_questions=grade.total,
+                answers=answers
+            )
+            for (user_id, answers), grade in zip(sheets, grades)
+        ])
+        record_grades(quiz.pk, key, [(attempt.user_id, grade) for attempt, grade in zip(attempts, grades)])
+        bump_user_version_on_commit(quiz.user_id)
+        
+        serializer = QuizAttemptSerializer(attempts, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Score histogram for the quiz plus the requesting user's trend"""
+        quiz = self.get_object()
+        buckets = list(quiz.score_buckets.all())
+        attempts = sum(bucket.count for bucket in buckets)
+        total_score = sum(bucket.score * bucket.count for bucket in buckets)
+        
+        return Response({
+            'attempts': attempts,
+            'averageScore': round(total_score / attempts, 2) if attempts else None,
+            'histogram': QuizScoreBucketSerializer(buckets, many=True).data,
+            'you': self._user_quiz_stats(quiz),
+        })
+    
+    @action(detail=True, methods=['get'], url_path='analytics/questions')
+    def analytics_questions(self, request, pk=None):
+        """Attempt and correct counts for every question on the quiz"""
+        quiz = self.get_object()
+        questions = quiz.questions.annotate(
+            attempts=Coalesce('stats__attempts', 0),
+            correct=Coalesce('stats__correct', 0),
+        )
+        return Response(QuestionAnalyticsSerializer(questions, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path='analytics/trend')
+    def analytics_trend(self, request, pk=None):
+        """The requesting user's running scores on the quiz"""
+        return Response(self._user_quiz_stats(self.get_object()))
+    
+    def _user_quiz_stats(self, quiz):
+        if not self.request.user.is_authenticated:
+            return None
+        stats = UserQuizStats.objects.filter(user=self.request.user, quiz=quiz).first()
+        return UserQuizStatsSerializer(stats).data if stats else None
 
 
-class QuizQuestionViewSet(viewsets.ModelViewSet):
+class QuizQuestionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing quiz questions"""
     queryset = QuizQuestion.objects.all()
     serializer_class = QuizQuestionSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = API_RENDERER_CLASSES
     
     def get_queryset(self):
         # Filter to only show questions from user's quizzes
@@ -216,10 +570,11 @@ class QuizQuestionViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class AssignmentViewSet(UserFilteredViewSet):
+class AssignmentViewSet(BulkMixin, UserFilteredViewSet):
     """ViewSet for managing assignments"""
     queryset = Assignment.objects.all()
     serializer_class = AssignmentSerializer
+    read_serializer_class = AssignmentReadSerializer
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -239,16 +594,26 @@ class AssignmentViewSet(UserFilteredViewSet):
     def mark_completed(self, request, pk=None):
         """Mark an assignment as completed"""
         assignment = self.get_object()
+        changed = assignment.status != 'completed'
         assignment.status = 'completed'
         assignment.save()
+        if changed:
+            emit_activity(assignment.user_id, f'Completed Assignment - {assignment.title}')
         serializer = self.get_serializer(assignment)
         return Response(serializer.data)
 
 
-class WeeklyGoalViewSet(UserFilteredViewSet):
+class WeeklyGoalViewSet(BulkMixin, UserFilteredViewSet):
     """ViewSet for managing weekly goals"""
     queryset = WeeklyGoal.objects.all()
     serializer_class = WeeklyGoalSerializer
+    read_serializer_class = WeeklyGoalReadSerializer
+    # Activity feed wording for each status a goal can move to
+    status_activity = {
+        'pending': 'Reopened Goal',
+        'in-progress': 'Started Goal',
+        'completed': 'Completed Goal',
+    }
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -268,8 +633,11 @@ class WeeklyGoalViewSet(UserFilteredViewSet):
         goal = self.get_object()
         new_status = request.data.get('status')
         if new_status in ['pending', 'in-progress', 'completed']:
+            changed = goal.status != new_status
             goal.status = new_status
             goal.save()
+            if changed:
+                emit_activity(goal.user_id, f'{self.status_activity[new_status]} - {goal.text}')
             serializer = self.get_serializer(goal)
             return Response(serializer.data)
         return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
@@ -279,161 +647,381 @@ class StudyActivityViewSet(UserFilteredViewSet):
     """ViewSet for managing study activities"""
     queryset = StudyActivity.objects.all()
     serializer_class = StudyActivitySerializer
+    read_serializer_class = StudyActivityReadSerializer
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        limit = self.request.query_params.get('limit', None)
+        month = self.request.query_params.get('month', None)
         
-        if limit:
-            queryset = queryset[:int(limit)]
+        if month:
+            try:
+                queryset = queryset.filter(month=datetime.strptime(month, '%Y-%m').date())
+            except ValueError:
+                raise ValidationError({'month': 'Expected YYYY-MM'})
         
         return queryset
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent activities (last 10)"""
-        activities = self.get_queryset()[:10]
-        serializer = self.get_serializer(activities, many=True)
-        return Response(serializer.data)
+        if not request.user.is_authenticated:
+            return self.read_response(self.get_queryset()[:10])
+        rows = get_activity_feed(request.user.pk, 10)
+        with stage('serialize'):
+            return Response(StudyActivityReadSerializer.serialize(rows))
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def history(self, request):
+        """Activity per month, newest first, including months archived into rollups"""
+        live = StudyActivity.objects.filter(user=request.user).order_by().values('month').annotate(
+            activities=Count('id'),
+            first_activity=Min('activity_time'),
+            last_activity=Max('activity_time'),
+        )
+        rollups = StudyActivityRollup.objects.filter(user=request.user)
+        
+        months = {}
+        for rollup in rollups:
+            months.setdefault(rollup.month, []).append(rollup)
+        for row in live:
+            months.setdefault(row['month'], []).append(StudyActivityRollup(**row))
+        
+        history = [self._merge_months(parts) for _, parts in sorted(months.items(), reverse=True)]
+        return Response(StudyActivityMonthSerializer(history, many=True).data)
+    
+    def _merge_months(self, parts):
+        # Rows added for a month after it was archived are still live
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.activities += part.activities
+            merged.first_activity = min(merged.first_activity, part.first_activity)
+            merged.last_activity = max(merged.last_activity, part.last_activity)
+            merged.pk = merged.pk or part.pk
+        return merged
 
 
 class SubjectPerformanceViewSet(UserFilteredViewSet):
     """ViewSet for managing subject performance"""
     queryset = SubjectPerformance.objects.all()
     serializer_class = SubjectPerformanceSerializer
+    read_serializer_class = SubjectPerformanceReadSerializer
 
 
 class ExamViewSet(UserFilteredViewSet):
     """ViewSet for managing exams"""
     queryset = Exam.objects.all()
     serializer_class = ExamSerializer
+    read_serializer_class = ExamReadSerializer
     
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming exams"""
         today = timezone.now().date()
-        exams = self.get_queryset().filter(exam_date__gte=today)
-        serializer = self.get_serializer(exams, many=True)
-        return Response(serializer.data)
+        return self.read_response(self.get_queryset().filter(exam_date__gte=today))
+
+
+class DocumentViewSet(UserFilteredViewSet):
+    """
+    Uploaded PDFs, listed from the database instead of the object store.
+    
+    Documents are created by the upload endpoints, so only reads and deletes
+    are exposed here.
+    """
+    queryset = Document.objects.all()
+    serializer_class = DocumentSerializer
+    read_serializer_class = DocumentReadSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'delete', 'head', 'options']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        subject_id = self.request.query_params.get('subject_id', None)
+        
+        if subject_id:
+            queryset = queryset.filter(subject_id=subject_id)
+        
+        return queryset
+    
+    def perform_destroy(self, instance):
+        key = instance.key
+        instance.delete()
+        # The same object may back other documents (e.g. re-uploads)
+        if not Document.objects.filter(key=key).exists():
+            delete_object(key)
+    
+    @action(detail=True, methods=['get'])
+    def url(self, request, pk=None):
+        """Return a fresh-enough download URL, regenerating expired presigned URLs"""
+        document = self.get_object()
+        return Response({'id': document.pk, 'url': get_cached_object_url(document.key)})
 
 
+def user_data_etag(request, *args, **kwargs):
+    return user_etag(request, get_user_from_request(request))
+
+
+def schedule_data_etag(request, *args, **kwargs):
+    """user_data_etag for responses showing schedule statuses, which follow the clock"""
+    return user_etag(request, get_user_from_request(request), STATUS_INTERVAL)
+
+
+@etag(schedule_data_etag)
 @api_view(['GET'])
+@renderer_classes(API_RENDERER_CLASSES)
 def dashboard_overview(request):
     """Get all dashboard data in a single request"""
     user = get_user_from_request(request)
     if not user:
         return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
     
-    today = timezone.now().date()
-    week_start = today - timedelta(days=today.weekday())
+    return Response(get_dashboard(user))
+
+
+@etag(user_data_etag)
+@api_view(['GET'])
+@renderer_classes(API_RENDERER_CLASSES)
+def study_time(request, period):
+    """
+    Time studied per subject for every day, week or month in a date range.
     
-    # Get all relevant data for THIS USER only
-    schedule = ScheduleItem.objects.filter(user=user, date=today)
-    upcoming_quiz = Quiz.objects.filter(user=user, quiz_date__gte=today).first()
-    upcoming_exam = Exam.objects.filter(user=user, exam_date__gte=today).first()
-    assignments = Assignment.objects.filter(user=user)
-    goals = WeeklyGoal.objects.filter(user=user, week_start=week_start)
-    activities = StudyActivity.objects.filter(user=user)[:5]
-    performance = SubjectPerformance.objects.filter(user=user)
+    ?from= and ?to= (YYYY-MM-DD, inclusive) default to the last few periods
+    up to today.
+    """
+    user = get_user_from_request(request)
+    if not user:
+        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Calculate assignment stats
-    total_assignments = assignments.count()
-    completed_assignments = assignments.filter(status='completed').count()
+    last = parse_date_param(request, 'to', timezone.now().date())
+    first = parse_date_param(request, 'from', default_first_day(period, last))
+    if first > last:
+        return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+    if (last - first).days >= MAX_RANGE_DAYS[period]:
+        return Response(
+            {'error': f'At most {MAX_RANGE_DAYS[period]} days per request'}, status=status.HTTP_400_BAD_REQUEST
+        )
     
-    return Response({
-        'schedule': ScheduleItemSerializer(schedule, many=True).data,
-        'upcomingQuiz': QuizListSerializer(upcoming_quiz).data if upcoming_quiz else None,
-        'upcomingExam': ExamSerializer(upcoming_exam).data if upcoming_exam else None,
-        'assignments': {
-            'completed': completed_assignments,
-            'total': total_assignments,
-            'remaining': total_assignments - completed_assignments
-        },
-        'weeklyGoals': WeeklyGoalSerializer(goals, many=True).data,
-        'recentActivities': StudyActivitySerializer(activities, many=True).data,
-        'subjectPerformance': SubjectPerformanceSerializer(performance, many=True).data
-    })
+    with stage('serialize'):
+        return Response(study_time_range(user.pk, period, first, last))
+
+
+def find_document(user, sha256):
+    """The user's existing upload with this content hash, if any"""
+    if not sha256:
+        return None
+    return Document.objects.filter(user=user, sha256=sha256.lower()).exclude(sha256='').first()
+
+
+def reuse_document(user, existing, subject_id, filename):
+    """Record a repeat upload against the object already stored for `existing`"""
+    document, _ = Document.objects.get_or_create(
+        user=user, subject_id=subject_id, sha256=existing.sha256,
+        defaults={'key': existing.key, 'filename': filename, 'size': existing.size}
+    )
+    return document
 
 
 # Cloudflare R2 PDF Upload
 @api_view(['POST'])
 def upload_pdf(request):
-    """Upload PDF to Cloudflare R2 storage"""
-    import boto3
-    from botocore.config import Config
-    import os
-    import uuid
+    """
+    Upload PDF to Cloudflare R2 storage.
     
+    The file is hashed and streamed into R2 while the request body is parsed,
+    and stored under a content-addressed key. A PDF the user already uploaded
+    is not stored again: the existing object is returned with duplicate=true.
+    Clients that know the SHA-256 up front can send it as X-Content-SHA256 to
+    skip sending the body altogether when it is a repeat.
+    """
     user = get_user_from_request(request)
     if not user:
         return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
     
-    if 'file' not in request.FILES:
-        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    file = request.FILES['file']
-    
-    # Validate file type
-    if not file.name.lower().endswith('.pdf'):
-        return Response({'error': 'Only PDF files allowed'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Validate file size (50MB max)
-    if file.size > 50 * 1024 * 1024:
-        return Response({'error': 'File too large. Max 50MB'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Get R2 credentials from environment
-    account_id = os.environ.get('R2_ACCOUNT_ID')
-    access_key = os.environ.get('R2_ACCESS_KEY_ID')
-    secret_key = os.environ.get('R2_SECRET_ACCESS_KEY')
-    bucket_name = os.environ.get('R2_BUCKET_NAME', 'study-dashboard-pdfs')
-    public_url = os.environ.get('R2_PUBLIC_URL', '')
-    
-    if not all([account_id, access_key, secret_key]):
+    config = get_r2_config()
+    if config is None:
         return Response({'error': 'R2 storage not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     try:
-        # Create S3 client for R2
-        s3 = boto3.client(
-            's3',
-            endpoint_url=f'https://{account_id}.r2.cloudflarestorage.com',
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            config=Config(signature_version='s3v4'),
-            region_name='auto'
-        )
+        existing = find_document(user, request.META.get('HTTP_X_CONTENT_SHA256'))
+        if existing is not None:
+            subject_id = request.query_params.get('subject_id', existing.subject_id)
+            filename = request.query_params.get('filename', existing.filename)
+            document = reuse_document(user, existing, subject_id, filename)
+            return pdf_upload_response(document, config, duplicate=True)
         
-        # Generate unique filename
-        subject_id = request.data.get('subject_id', 'general')
-        file_ext = file.name.split('.')[-1]
-        unique_name = f"{subject_id}/{uuid.uuid4().hex}.{file_ext}"
-        
-        # Upload file
-        s3.upload_fileobj(
-            file,
-            bucket_name,
-            unique_name,
-            ExtraArgs={
-                'ContentType': 'application/pdf',
-            }
+        handler = R2StreamingUploadHandler(
+            request,
+            key=f"{user.pk}/uploads/{uuid.uuid4().hex}.pdf",
+            find_duplicate=lambda sha256: find_document(user, sha256),
+            key_for_hash=lambda sha256: content_key(user.pk, sha256)
         )
+        request.upload_handlers = [handler]
         
-        # Generate URL
-        if public_url:
-            file_url = f"{public_url}/{unique_name}"
-        else:
-            # Generate presigned URL (valid for 7 days)
-            file_url = s3.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': bucket_name, 'Key': unique_name},
-                ExpiresIn=604800  # 7 days
-            )
+        try:
+            files = request.FILES
+        except Exception:
+            # Django only calls upload_interrupted() when the body ends early,
+            # not when reading it fails (e.g. the client disconnects)
+            handler.abort()
+            raise
         
-        return Response({
-            'success': True,
-            'url': file_url,
-            'filename': file.name
-        })
+        if 'file' not in files:
+            error = handler.error or 'No file provided'
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        file = files['file']
+        subject_id = request.data.get('subject_id') or request.query_params.get('subject_id', 'general')
+        
+        if handler.duplicate is not None:
+            document = reuse_document(user, handler.duplicate, subject_id, file.name)
+            return pdf_upload_response(document, config, duplicate=True)
+        
+        document = Document.objects.create(
+            user=user, subject_id=subject_id, key=file.key,
+            filename=file.name, size=file.size, sha256=file.sha256
+        )
+        return pdf_upload_response(document, config)
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+def first_error(errors):
+    """The first message in a serializer's (possibly nested) errors"""
+    if isinstance(errors, dict):
+        errors = errors.values()
+    for error in errors:
+        if isinstance(error, str):
+            return error
+        if error:
+            return first_error(error)
+
+
+def invalid_upload_response(serializer):
+    """400 in the upload endpoints' {'error': message} shape, with the per-field errors"""
+    return Response(
+        {'error': first_error(serializer.errors), 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def pdf_upload_response(document, config, duplicate=False):
+    return Response({
+        'success': True,
+        'id': document.pk,
+        'url': get_cached_object_url(document.key, config),
+        'filename': document.filename,
+        'duplicate': duplicate
+    })
+
+
+@api_view(['POST'])
+def presign_pdf_upload(request):
+    """
+    Step 1 of a direct-to-R2 upload: issue presigned URL(s) for the client.
+    
+    Returns a signed ticket that ties the object key to this user; it must be
+    passed back to complete_pdf_upload once the bytes are in R2. If the client
+    sends the file's sha256 and the user already uploaded it, the existing
+    document is returned instead (duplicate=true) and nothing is presigned.
+    """
+    user = get_user_from_request(request)
+    if not user:
+        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    config = get_r2_config()
+    if config is None:
+        return Response({'error': 'R2 storage not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    serializer = PresignUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return invalid_upload_response(serializer)
+    filename = serializer.validated_data['filename']
+    size = serializer.validated_data['size']
+    subject_id = serializer.validated_data['subject_id']
+    
+    # Repeat of a PDF already stored for this user: nothing to upload
+    existing = find_document(user, serializer.validated_data.get('sha256'))
+    if existing is not None:
+        document = reuse_document(user, existing, subject_id, filename)
+        return pdf_upload_response(document, config, duplicate=True)
+    
+    try:
+        key = f"{user.pk}/{subject_id}/{uuid.uuid4().hex}.pdf"
+        upload = create_presigned_upload(key, size)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    ticket = signing.dumps(
+        {
+            'user': user.pk, 'key': key, 'subject_id': subject_id,
+            'upload_id': upload['upload_id'], 'filename': filename
+        },
+        salt=UPLOAD_TICKET_SALT
+    )
+    return Response({
+        'duplicate': False,
+        'ticket': ticket,
+        'method': upload['method'],
+        'url': upload['url'],
+        'uploadId': upload['upload_id'],
+        'partSize': MULTIPART_PART_SIZE,
+        'parts': upload['parts'],
+        'expiresIn': PRESIGNED_UPLOAD_EXPIRY,
+    })
+
+
+@api_view(['POST'])
+def complete_pdf_upload(request):
+    """
+    Step 2 of a direct-to-R2 upload: confirm the object and return its URL.
+    
+    Completing the same ticket again returns the document recorded the
+    first time.
+    """
+    user = get_user_from_request(request)
+    if not user:
+        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    config = get_r2_config()
+    if config is None:
+        return Response({'error': 'R2 storage not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    serializer = CompleteUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return invalid_upload_response(serializer)
+    
+    try:
+        ticket = signing.loads(
+            serializer.validated_data['ticket'], salt=UPLOAD_TICKET_SALT, max_age=PRESIGNED_UPLOAD_EXPIRY
+        )
+    except signing.BadSignature:
+        return Response({'error': 'Invalid or expired upload ticket'}, status=status.HTTP_400_BAD_REQUEST)
+    if ticket['user'] != user.pk:
+        return Response({'error': 'Invalid or expired upload ticket'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    document = Document.objects.filter(user=user, key=ticket['key']).first()
+    if document is not None:
+        response = pdf_upload_response(document, config)
+        response.data['size'] = document.size
+        return response
+    
+    parts = serializer.validated_data['parts']
+    if ticket['upload_id'] and not parts:
+        return Response({'error': 'parts are required for multipart uploads'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        size = complete_presigned_upload(ticket['key'], ticket['upload_id'], parts)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    # No sha256: the bytes never passed through us, so the hash is unverified.
+    # get_or_create covers a retry that raced this request.
+    document, _ = Document.objects.get_or_create(
+        user=user, key=ticket['key'],
+        defaults={'subject_id': ticket['subject_id'], 'filename': ticket['filename'], 'size': size}
+    )
+    
+    response = pdf_upload_response(document, config)
+    response.data['size'] = size
+    return response
@@ -4,6 +4,7 @@ Production-ready configuration with environment variables.
 """
 
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,6 +71,16 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'studydashboard.wsgi.application'
+ASGI_APPLICATION = 'studydashboard.asgi.application'
+
+# Route the views in api/async_views.py (the live dashboard stream). Only
+# useful under an ASGI server such as gunicorn with uvicorn workers (see
+# DEPLOY.md).
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Pub/sub behind the live dashboard stream (/api/dashboard/stream/, ASYNC_VIEWS
+# only). The in-process default only reaches clients on the same worker.
+LIVE_UPDATES_BACKEND = os.environ.get('LIVE_UPDATES_BACKEND', 'api.live.InProcessBackend')
 
 # Database configuration - PostgreSQL in production, SQLite for local
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -84,6 +96,58 @@ else:
         }
     }
 
+# Cache - used for per-user dashboard snapshots. The file backend is shared by
+# every gunicorn worker on the host, so signal-driven invalidation in one
+# worker is seen by the others. Set CACHE_BACKEND to
+# django.core.cache.backends.locmem.LocMemCache for tests or local runs.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'studydashboard-cache')),
+    }
+}
+
+# Token authentication cache (api.authentication). Entries live in a bounded
+# in-process LRU for TOKEN_CACHE_LOCAL_TTL seconds and in the shared cache for
+# TOKEN_CACHE_TTL seconds; deleting a token invalidates both.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_LOCAL_TTL = int(os.environ.get('TOKEN_CACHE_LOCAL_TTL', 60))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 3600))
+
+# Activity log (api/activity_log.py): rows kept per user in the cached feed,
+# seconds a cached feed lives at most, and whole months of raw activity kept
+# before `manage.py compact_activities` folds them into monthly rollups.
+ACTIVITY_FEED_SIZE = int(os.environ.get('ACTIVITY_FEED_SIZE', 20))
+ACTIVITY_FEED_TTL = int(os.environ.get('ACTIVITY_FEED_TTL', 300))
+ACTIVITY_RETENTION_MONTHS = int(os.environ.get('ACTIVITY_RETENTION_MONTHS', 12))
+
+# Server-side activity events (api/events.py) are written in batches of up to
+# ACTIVITY_EVENT_BATCH_SIZE, at least every ACTIVITY_EVENT_FLUSH_MS
+# milliseconds, by a background thread. 0 writes each event synchronously.
+ACTIVITY_EVENT_BATCH_SIZE = int(os.environ.get('ACTIVITY_EVENT_BATCH_SIZE', 100))
+ACTIVITY_EVENT_FLUSH_MS = int(os.environ.get('ACTIVITY_EVENT_FLUSH_MS', 500))
+# Events a worker keeps while the database is unavailable; the oldest are
+# dropped beyond this
+ACTIVITY_EVENT_MAX_PENDING = int(os.environ.get('ACTIVITY_EVENT_MAX_PENDING', 10000))
+
+# Schedule items change status with the clock (api/schedule_status.py) only
+# if they are dated at most this many days back
+SCHEDULE_AUTO_ADVANCE_DAYS = int(os.environ.get('SCHEDULE_AUTO_ADVANCE_DAYS', 2))
+
+# Request instrumentation (api/middleware.py): the fraction of requests that
+# are measured and get a Server-Timing header. 0 turns sampling off.
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0.05))
+
+# N+1 detection on instrumented requests (api/nplusone.py): 'log' warns on
+# sampled requests, 'raise' checks every request and fails it (tests,
+# `manage.py check_nplusone`), 'off' disables it. A query shape repeated more
+# than NPLUSONE_THRESHOLD times in one request is reported.
+NPLUSONE_MODE = os.environ.get('NPLUSONE_MODE', 'log')
+NPLUSONE_THRESHOLD = int(os.environ.get('NPLUSONE_THRESHOLD', 5))
+
+# Bearer token for scraping /api/metrics/; staff users can always read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},